@@ -0,0 +1,614 @@
+import asyncio
+import datetime
+import json
+import os
+import tempfile
+from typing import Any
+
+from logger import LoggerManager
+
+logger = LoggerManager(name="Inactivity", level="INFO", log_file="logs/Inactivity.log").get_logger()
+
+ACTIVITY_DIR: str = "activity"
+# Days of daily voice buckets kept before they are rolled up into months
+VOICE_RETENTION_DAYS = int(os.getenv("ACTIVITY_VOICE_RETENTION_DAYS", "400"))
+
+
+def write_json_atomic(file_path: str, payload: str) -> None:
+    """
+    Writes an already serialized JSON document to ``file_path`` atomically.
+
+    The data is written to a temporary file in the same directory, flushed to disk and then moved over the
+    target with ``os.replace``. Readers therefore either see the previous or the new file, never a partially
+    written one, even if the bot is killed in the middle of a write.
+
+    :param file_path: The destination file path.
+    :type file_path: str
+    :param payload: The serialized JSON document.
+    :type payload: str
+    :return: None
+    """
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class GuildJsonStore:
+    """
+    Base class for write-behind, per-guild JSON stores in the ``activity`` folder.
+
+    The data of a guild is loaded once from ``activity/{guild_id}{suffix}.json`` and kept in memory
+    afterwards. Updates only touch the in-memory data and mark the guild as dirty; :meth:`flush` writes the
+    dirty guilds back to disk. Subclasses convert between the on-disk and the in-memory representation with
+    :meth:`_decode` and :meth:`_encode`.
+    """
+
+    suffix: str = ""
+
+    def __init__(self, directory: str = ACTIVITY_DIR) -> None:
+        self.directory: str = directory
+        self._data: dict[int, Any] = {}
+        self._dirty: set[int] = set()
+        self._flush_lock: asyncio.Lock = asyncio.Lock()
+
+    def _file_path(self, guild_id: int) -> str:
+        return os.path.join(self.directory, f"{guild_id}{self.suffix}.json")
+
+    def _decode(self, raw: dict[str, Any]) -> Any:
+        return raw
+
+    def _encode(self, guild_id: int, data: Any) -> dict[str, Any]:
+        return data
+
+    def get_guild(self, guild_id: int) -> Any:
+        """
+        Returns the in-memory data of a guild, loading it from disk on first access.
+
+        The returned object is the live aggregate and must be treated as read-only by callers.
+
+        :param guild_id: The unique identifier of the guild.
+        :type guild_id: int
+        :return: The data of the guild.
+        """
+        data = self._data.get(guild_id)
+        if data is None:
+            file_path = self._file_path(guild_id)
+            raw: dict[str, Any] = {}
+            if os.path.isfile(file_path):
+                try:
+                    with open(file_path, "r") as f:
+                        raw = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.error(f"Failed to load {file_path}: {e}")
+            data = self._decode(raw)
+            self._data[guild_id] = data
+        return data
+
+    def mark_dirty(self, guild_id: int) -> None:
+        self._dirty.add(guild_id)
+
+    async def flush(self) -> None:
+        """
+        Writes every dirty guild to disk with an atomic replace.
+
+        The in-memory data is serialized on the event loop so it cannot change while being written; the
+        blocking file I/O runs in a worker thread. Guilds that fail to save stay dirty and are retried on the
+        next flush.
+
+        :return: None
+        """
+        async with self._flush_lock:
+            dirty, self._dirty = self._dirty, set()
+            for guild_id in dirty:
+                payload = json.dumps(self._encode(guild_id, self._data.get(guild_id)))
+                try:
+                    await asyncio.to_thread(write_json_atomic, self._file_path(guild_id), payload)
+                except OSError as e:
+                    logger.error(f"Failed to flush {self._file_path(guild_id)}: {e}")
+                    self._dirty.add(guild_id)
+            if dirty:
+                logger.debug(f"Flushed {type(self).__name__} for {len(dirty)} guild(s)")
+
+
+class VoiceActivityStore(GuildJsonStore):
+    """
+    Write-behind, in-memory time-series store for the voice activity of every tracked guild.
+
+    Voice time and connections are kept in daily buckets per user. Days older than ``retention_days`` are
+    rolled up into monthly buckets so the file stays compact. Window queries add up the daily buckets of
+    the requested days, which gives exact totals for any window inside the retention period; monthly
+    buckets (rolled-up days and data from the old monthly format) count whenever their month overlaps the
+    window.
+
+    The store also remembers which users had an open voice session at the last flush, so sessions that were
+    already counted as a connection are not counted again when they are rebuilt after a restart.
+
+    Stored as ``activity/{guild_id}.json``:
+    ``{"version": 2, "users": {user_id: {"days": {"YYYY-MM-DD": [seconds, connections]},
+    "months": {"YYYY-MM": [seconds, connections]}}}, "open_sessions": [user_id, ...]}``. Files in the old
+    ``{user_id: {"YYYY-MM": {"voice_times": int, "voicechannel_connections": int}}}`` layout are migrated
+    into monthly buckets on load.
+    """
+
+    def __init__(self, directory: str = ACTIVITY_DIR, retention_days: int = VOICE_RETENTION_DAYS) -> None:
+        super().__init__(directory)
+        self.retention_days: int = retention_days
+        self._rolled_up: dict[int, int] = {}  # guild_id -> ordinal of the day the last rollup ran
+
+    def _decode(self, raw: dict[str, Any]) -> dict[str, Any]:
+        users: dict[int, dict[str, dict]] = {}
+        if raw.get("version") == 2:
+            for user_id, series in raw.get("users", {}).items():
+                users[int(user_id)] = {
+                    "days": {datetime.date.fromisoformat(day).toordinal(): list(bucket)
+                             for day, bucket in series.get("days", {}).items()},
+                    "months": {month: list(bucket) for month, bucket in series.get("months", {}).items()},
+                }
+        else:
+            # Legacy layout with one bucket per month
+            for user_id, months in raw.items():
+                users[int(user_id)] = {
+                    "days": {},
+                    "months": {month: [data.get("voice_times", 0), data.get("voicechannel_connections", 0)]
+                               for month, data in months.items()},
+                }
+        return {"users": users, "open_sessions": set(raw.get("open_sessions", []))}
+
+    def _encode(self, guild_id: int, data: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "version": 2,
+            "open_sessions": sorted(data["open_sessions"]),
+            "users": {
+                str(user_id): {
+                    "days": {datetime.date.fromordinal(day).isoformat(): bucket
+                             for day, bucket in series["days"].items()},
+                    "months": series["months"],
+                }
+                for user_id, series in data["users"].items()
+            },
+        }
+
+    def _user(self, guild_id: int, user_id: int) -> dict[str, dict]:
+        return self.get_guild(guild_id)["users"].setdefault(user_id, {"days": {}, "months": {}})
+
+    def open_sessions(self, guild_id: int) -> set[int]:
+        return self.get_guild(guild_id)["open_sessions"]
+
+    def set_open_sessions(self, guild_id: int, user_ids: set[int]) -> None:
+        data = self.get_guild(guild_id)
+        if data["open_sessions"] != user_ids:
+            data["open_sessions"] = set(user_ids)
+            self.mark_dirty(guild_id)
+
+    def record(self, guild_id: int, user_id: int, seconds: int = 0, connections: int = 0,
+               when: datetime.datetime | None = None) -> None:
+        """
+        Adds voice time and connection count for a user to the daily bucket of ``when`` in one update.
+
+        :param guild_id: The unique identifier of the guild.
+        :type guild_id: int
+        :param user_id: The unique identifier of the user.
+        :type user_id: int
+        :param seconds: The voice time to add, in seconds.
+        :type seconds: int
+        :param connections: The number of voice channel connections to add.
+        :type connections: int
+        :param when: The time the activity is credited to. Defaults to now (UTC).
+        :type when: datetime.datetime | None
+        :return: None
+        """
+        if seconds <= 0 and connections <= 0:
+            return
+        when = when or datetime.datetime.now(datetime.timezone.utc)
+        bucket = self._user(guild_id, user_id)["days"].setdefault(when.date().toordinal(), [0, 0])
+        bucket[0] += int(seconds)
+        bucket[1] += int(connections)
+        self.mark_dirty(guild_id)
+
+    def record_span(self, guild_id: int, user_id: int, start: datetime.datetime, end: datetime.datetime,
+                    connections: int = 0) -> None:
+        """
+        Credits the voice time between ``start`` and ``end`` to the daily buckets it falls into, splitting
+        sessions that cross midnight (UTC). Connections are credited to the day of ``start``.
+
+        :param guild_id: The unique identifier of the guild.
+        :type guild_id: int
+        :param user_id: The unique identifier of the user.
+        :type user_id: int
+        :param start: The start of the voice time.
+        :type start: datetime.datetime
+        :param end: The end of the voice time.
+        :type end: datetime.datetime
+        :param connections: The number of voice channel connections to add.
+        :type connections: int
+        :return: None
+        """
+        self.record(guild_id, user_id, connections=connections, when=start)
+        cursor = start
+        while cursor < end:
+            next_midnight = datetime.datetime.combine(
+                cursor.date() + datetime.timedelta(days=1), datetime.time(), tzinfo=datetime.timezone.utc)
+            chunk_end = min(end, next_midnight)
+            self.record(guild_id, user_id, seconds=int((chunk_end - cursor).total_seconds()), when=cursor)
+            cursor = chunk_end
+
+    def window_totals(self, guild_id: int, user_id: int, start: datetime.datetime, end: datetime.datetime
+                      ) -> tuple[int, int]:
+        """
+        Returns the voice seconds and connections of a user between ``start`` and ``end``.
+
+        Only the daily buckets inside the window and the monthly buckets overlapping it are looked up, so the
+        cost depends on the window length, not on the amount of stored history.
+
+        :param guild_id: The unique identifier of the guild.
+        :type guild_id: int
+        :param user_id: The unique identifier of the user.
+        :type user_id: int
+        :param start: The start of the window.
+        :type start: datetime.datetime
+        :param end: The end of the window.
+        :type end: datetime.datetime
+        :return: The total voice seconds and connections.
+        :rtype: tuple[int, int]
+        """
+        series = self.get_guild(guild_id)["users"].get(user_id)
+        if series is None:
+            return 0, 0
+        seconds, connections = 0, 0
+        first_day, last_day = start.date().toordinal(), end.date().toordinal()
+        days = series["days"]
+        if len(days) < last_day - first_day + 1:
+            buckets = [bucket for day, bucket in days.items() if first_day <= day <= last_day]
+        else:
+            buckets = [days[day] for day in range(first_day, last_day + 1) if day in days]
+        for bucket in buckets:
+            seconds += bucket[0]
+            connections += bucket[1]
+        if series["months"]:
+            year, month = start.year, start.month
+            while (year, month) <= (end.year, end.month):
+                bucket = series["months"].get(f"{year:04d}-{month:02d}")
+                if bucket:
+                    seconds += bucket[0]
+                    connections += bucket[1]
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return seconds, connections
+
+    def roll_up(self, guild_id: int) -> None:
+        """
+        Moves the daily buckets older than the retention period into their monthly buckets.
+
+        :param guild_id: The unique identifier of the guild.
+        :type guild_id: int
+        :return: None
+        """
+        cutoff = datetime.datetime.now(datetime.timezone.utc).date().toordinal() - self.retention_days
+        rolled = 0
+        for series in self.get_guild(guild_id)["users"].values():
+            for day in [day for day in series["days"] if day < cutoff]:
+                seconds, connections = series["days"].pop(day)
+                bucket = series["months"].setdefault(datetime.date.fromordinal(day).strftime("%Y-%m"), [0, 0])
+                bucket[0] += seconds
+                bucket[1] += connections
+                rolled += 1
+        if rolled:
+            self.mark_dirty(guild_id)
+            logger.info(f"Rolled {rolled} daily voice buckets of guild {guild_id} up into months")
+
+    async def flush(self) -> None:
+        # Rollups run at most once per day and guild, right before the data is written anyway
+        today = datetime.datetime.now(datetime.timezone.utc).date().toordinal()
+        for guild_id in list(self._dirty):
+            if self._rolled_up.get(guild_id) != today:
+                self._rolled_up[guild_id] = today
+                self.roll_up(guild_id)
+        await super().flush()
+
+
+class MessageIndex(GuildJsonStore):
+    """
+    Persisted index of the last message time per (guild, user), kept up to date by the ``on_message`` listener.
+
+    Besides the timestamps, the index remembers which time ranges it has fully observed ("coverage"). While
+    the bot is connected, every guild has an open live range starting when observing began. Ranges outside
+    the coverage (downtime, or time before the index existed) are reported by :meth:`uncovered` so the
+    inactivity check only has to crawl those gaps; a completed crawl is added with :meth:`mark_covered`.
+
+    Stored as ``activity/{guild_id}_messages.json``:
+    ``{"last_messages": {user_id: epoch}, "coverage": [[start_epoch, end_epoch], ...]}``. The open live range
+    grows on every flush, so it is written to the small sidecar ``activity/{guild_id}_messages_live.json``
+    (``{"live_since": epoch, "live_until": epoch}``) instead; the main file is only rewritten when the
+    timestamps or the closed ranges change. A sidecar left by a run that ended without closing its live range
+    is merged into the coverage on load.
+    """
+
+    suffix = "_messages"
+
+    def __init__(self, directory: str = ACTIVITY_DIR) -> None:
+        super().__init__(directory)
+        self._live_files: set[int] = set()  # Guilds with a sidecar file on disk
+
+    def _live_path(self, guild_id: int) -> str:
+        return os.path.join(self.directory, f"{guild_id}{self.suffix}_live.json")
+
+    def get_guild(self, guild_id: int) -> dict[str, Any]:
+        if guild_id in self._data:
+            return self._data[guild_id]
+        data = super().get_guild(guild_id)
+        live_path = self._live_path(guild_id)
+        if os.path.isfile(live_path):
+            try:
+                with open(live_path, "r") as f:
+                    live = json.load(f)
+                start, end = (datetime.datetime.fromtimestamp(live[key], datetime.timezone.utc)
+                              for key in ("live_since", "live_until"))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"Failed to load {live_path}: {e}")
+            else:
+                data["coverage"] = self._merge_ranges(data["coverage"] + [(start, end)])
+                self.mark_dirty(guild_id)
+            self._live_files.add(guild_id)
+        return data
+
+    def _decode(self, raw: dict[str, Any]) -> dict[str, Any]:
+        def to_dt(value: float) -> datetime.datetime:
+            return datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+
+        return {
+            "last_messages": {int(uid): to_dt(ts) for uid, ts in raw.get("last_messages", {}).items()},
+            "coverage": [(to_dt(start), to_dt(end)) for start, end in raw.get("coverage", [])],
+            "live_since": None,
+        }
+
+    def _encode(self, guild_id: int, data: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "last_messages": {str(uid): ts.timestamp() for uid, ts in data["last_messages"].items()},
+            "coverage": [[start.timestamp(), end.timestamp()] for start, end in data["coverage"]],
+        }
+
+    @staticmethod
+    def _merge_ranges(ranges: list[tuple[datetime.datetime, datetime.datetime]]
+                      ) -> list[tuple[datetime.datetime, datetime.datetime]]:
+        merged: list[tuple[datetime.datetime, datetime.datetime]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def _coverage(self, data: dict[str, Any]) -> list[tuple[datetime.datetime, datetime.datetime]]:
+        ranges = list(data["coverage"])
+        if data["live_since"] is not None:
+            ranges.append((data["live_since"], datetime.datetime.now(datetime.timezone.utc)))
+        return self._merge_ranges(ranges)
+
+    def start_observing(self, guild_id: int, since: datetime.datetime) -> None:
+        """
+        Opens the live coverage range of a guild. Called once the gateway delivers messages of the guild.
+
+        :param guild_id: The unique identifier of the guild.
+        :type guild_id: int
+        :param since: The time from which every message of the guild is observed.
+        :type since: datetime.datetime
+        :return: None
+        """
+        data = self.get_guild(guild_id)
+        if data["live_since"] is None:
+            data["live_since"] = since
+
+    def stop_observing(self, guild_id: int, until: datetime.datetime) -> None:
+        """
+        Closes the live coverage range of a guild, e.g. when the gateway session is lost.
+
+        :param guild_id: The unique identifier of the guild.
+        :type guild_id: int
+        :param until: The last time messages of the guild were reliably observed.
+        :type until: datetime.datetime
+        :return: None
+        """
+        data = self.get_guild(guild_id)
+        if data["live_since"] is not None:
+            data["coverage"] = self._merge_ranges(data["coverage"] + [(data["live_since"], until)])
+            data["live_since"] = None
+            self.mark_dirty(guild_id)
+
+    def observed_guilds(self) -> list[int]:
+        return [guild_id for guild_id, data in self._data.items() if data["live_since"] is not None]
+
+    def record(self, guild_id: int, user_id: int, when: datetime.datetime) -> None:
+        """
+        Records a message of a user, keeping only the most recent timestamp.
+
+        :param guild_id: The unique identifier of the guild.
+        :type guild_id: int
+        :param user_id: The unique identifier of the message author.
+        :type user_id: int
+        :param when: The creation time of the message.
+        :type when: datetime.datetime
+        :return: None
+        """
+        last_messages = self.get_guild(guild_id)["last_messages"]
+        previous = last_messages.get(user_id)
+        if previous is None or when > previous:
+            last_messages[user_id] = when
+            self.mark_dirty(guild_id)
+
+    def merge(self, guild_id: int, last_messages: dict[int, datetime.datetime]) -> None:
+        for user_id, when in last_messages.items():
+            self.record(guild_id, user_id, when)
+
+    def last_messages(self, guild_id: int) -> dict[int, datetime.datetime]:
+        return self.get_guild(guild_id)["last_messages"]
+
+    def uncovered(self, guild_id: int, start: datetime.datetime, end: datetime.datetime
+                  ) -> list[tuple[datetime.datetime, datetime.datetime]]:
+        """
+        Returns the parts of ``[start, end]`` the index has not fully observed.
+
+        :param guild_id: The unique identifier of the guild.
+        :type guild_id: int
+        :param start: The start of the requested window.
+        :type start: datetime.datetime
+        :param end: The end of the requested window.
+        :type end: datetime.datetime
+        :return: The uncovered ranges in chronological order.
+        :rtype: list[tuple[datetime.datetime, datetime.datetime]]
+        """
+        gaps: list[tuple[datetime.datetime, datetime.datetime]] = []
+        cursor = start
+        for covered_start, covered_end in self._coverage(self.get_guild(guild_id)):
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def mark_covered(self, guild_id: int, start: datetime.datetime, end: datetime.datetime) -> None:
+        data = self.get_guild(guild_id)
+        data["coverage"] = self._merge_ranges(data["coverage"] + [(start, end)])
+        self.mark_dirty(guild_id)
+
+    async def flush(self) -> None:
+        """
+        Writes the dirty guilds, then the end of every open live range to its sidecar file. Sidecars of ranges
+        that were closed are removed once the main file holding the closed range has been written.
+
+        :return: None
+        """
+        await super().flush()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        async with self._flush_lock:
+            for guild_id, data in list(self._data.items()):
+                live_path = self._live_path(guild_id)
+                try:
+                    if data["live_since"] is not None:
+                        payload = json.dumps({"live_since": data["live_since"].timestamp(),
+                                              "live_until": now.timestamp()})
+                        await asyncio.to_thread(write_json_atomic, live_path, payload)
+                        self._live_files.add(guild_id)
+                    elif guild_id in self._live_files and guild_id not in self._dirty:
+                        try:
+                            await asyncio.to_thread(os.remove, live_path)
+                        except FileNotFoundError:
+                            pass
+                        self._live_files.discard(guild_id)
+                except OSError as e:
+                    logger.error(f"Failed to flush {live_path}: {e}")
+
+
+class CrawlStateStore(GuildJsonStore):
+    """
+    Per-channel crawl watermarks of the inactivity check, so history is never fetched twice.
+
+    For every channel and thread the store remembers the contiguous range of history that has been scanned,
+    from ``from`` up to the message snowflake ``watermark``, and the latest message time per user seen in it.
+    Watermarks advance message by message while crawling (history is read oldest first), so a crawl that is
+    interrupted or stopped early resumes at the last scanned message on the next run.
+
+    Stored as ``activity/{guild_id}_crawl.json``:
+    ``{channel_id: {"from": epoch, "watermark": snowflake, "users": {user_id: epoch}}}``.
+    """
+
+    suffix = "_crawl"
+
+    def _decode(self, raw: dict[str, Any]) -> dict[int, dict[str, Any]]:
+        def to_dt(value: float | None) -> datetime.datetime | None:
+            return datetime.datetime.fromtimestamp(value, datetime.timezone.utc) if value is not None else None
+
+        return {
+            int(channel_id): {
+                "from": to_dt(state.get("from")),
+                "watermark": state.get("watermark"),
+                "users": {int(uid): to_dt(ts) for uid, ts in state.get("users", {}).items()},
+            }
+            for channel_id, state in raw.items()
+        }
+
+    def _encode(self, guild_id: int, data: dict[int, dict[str, Any]]) -> dict[str, Any]:
+        return {
+            str(channel_id): {
+                "from": state["from"].timestamp() if state["from"] else None,
+                "watermark": state["watermark"],
+                "users": {str(uid): ts.timestamp() for uid, ts in state["users"].items()},
+            }
+            for channel_id, state in data.items()
+        }
+
+    def channel(self, guild_id: int, channel_id: int) -> dict[str, Any]:
+        """
+        Returns the crawl state of a channel or thread, creating an empty one if needed.
+
+        :param guild_id: The unique identifier of the guild.
+        :type guild_id: int
+        :param channel_id: The unique identifier of the channel or thread.
+        :type channel_id: int
+        :return: The state with the keys ``from``, ``watermark`` and ``users``.
+        :rtype: dict[str, Any]
+        """
+        return self.get_guild(guild_id).setdefault(channel_id, {"from": None, "watermark": None, "users": {}})
+
+    def restart(self, guild_id: int, channel_id: int, since: datetime.datetime) -> None:
+        # The scanned range has to stay contiguous; the user times remain valid evidence
+        state = self.channel(guild_id, channel_id)
+        state["from"] = since
+        state["watermark"] = None
+        self.mark_dirty(guild_id)
+
+    def advance(self, guild_id: int, channel_id: int, message_id: int, author_id: int | None,
+                created_at: datetime.datetime) -> None:
+        state = self.channel(guild_id, channel_id)
+        if state["watermark"] is None or message_id > state["watermark"]:
+            state["watermark"] = message_id
+        if author_id is not None:
+            previous = state["users"].get(author_id)
+            if previous is None or created_at > previous:
+                state["users"][author_id] = created_at
+        self.mark_dirty(guild_id)
+
+    def advance_users(self, guild_id: int, channel_id: int, author_id: int, created_at: datetime.datetime) -> None:
+        # Messages before the scanned range only update the user times, never the watermark
+        state = self.channel(guild_id, channel_id)
+        previous = state["users"].get(author_id)
+        if previous is None or created_at > previous:
+            state["users"][author_id] = created_at
+            self.mark_dirty(guild_id)
+
+    def extend_from(self, guild_id: int, channel_id: int, since: datetime.datetime) -> None:
+        state = self.channel(guild_id, channel_id)
+        if state["from"] is None or since < state["from"]:
+            state["from"] = since
+            self.mark_dirty(guild_id)
+
+    def user_times(self, guild_id: int, since: datetime.datetime) -> dict[int, datetime.datetime]:
+        """
+        Returns the latest message time per user across all channels, limited to messages after ``since``.
+
+        :param guild_id: The unique identifier of the guild.
+        :type guild_id: int
+        :param since: Only message times after this are returned.
+        :type since: datetime.datetime
+        :return: The latest message time per user ID.
+        :rtype: dict[int, datetime.datetime]
+        """
+        results: dict[int, datetime.datetime] = {}
+        for state in self.get_guild(guild_id).values():
+            for user_id, created_at in state["users"].items():
+                if created_at > since and (user_id not in results or created_at > results[user_id]):
+                    results[user_id] = created_at
+        return results
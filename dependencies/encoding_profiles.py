@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from PIL import Image
+
+from logger import LoggerManager
+
+logger = LoggerManager(name="ImageUpvote", level="INFO", log_file="logs/ImageUpvote.log").get_logger()
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """
+    How an image is encoded.
+
+    :param name: The name used in configs.
+    :type name: str
+    :param format: The Pillow format, ``"WEBP"`` or ``"AVIF"``.
+    :type format: str
+    :param lossless: Whether WEBP is encoded lossless. ``quality`` is then the compression effort.
+    :type lossless: bool
+    :param quality: The quality from 0 to 100.
+    :type quality: int
+    :param method: The WEBP method from 0 (fast) to 6 (slow, smaller).
+    :type method: int
+    :param speed: The AVIF speed from 0 (slow, smaller) to 10 (fast).
+    :type speed: int
+    :param max_size: Images larger than this are scaled down to fit, keeping the aspect ratio.
+    :type max_size: tuple[int, int] | None
+    """
+    name: str
+    format: str = "WEBP"
+    lossless: bool = False
+    quality: int = 80
+    method: int = 4
+    speed: int = 6
+    max_size: Optional[tuple[int, int]] = None
+
+    @property
+    def extension(self) -> str:
+        return f".{self.format.lower()}"
+
+    def save_options(self) -> dict[str, Any]:
+        """Returns the keyword arguments for ``Image.save``."""
+        if self.format == "AVIF":
+            return {"format": "AVIF", "quality": self.quality, "speed": self.speed}
+        return {"format": "WEBP", "lossless": self.lossless, "quality": self.quality, "method": self.method}
+
+    def is_supported(self) -> bool:
+        """Whether the installed Pillow can write this format (AVIF needs Pillow 11.2 or pillow-avif-plugin)."""
+        Image.init()
+        return self.format in Image.SAVE
+
+
+PROFILES: dict[str, EncodingProfile] = {
+    profile.name: profile
+    for profile in (
+        # The previous behaviour, still the best choice for screenshots, drawings and pixel art
+        EncodingProfile(name="lossless", format="WEBP", lossless=True, quality=80, method=4),
+        EncodingProfile(name="photo", format="WEBP", quality=85, method=4),
+        EncodingProfile(name="avif", format="AVIF", quality=60, speed=6),
+        EncodingProfile(name="thumbnail", format="WEBP", quality=75, method=4, max_size=(512, 512)),
+    )
+}
+
+# Profile per source content type when neither the guild nor IMAGE_UPVOTE_IMAGE_PROFILE chooses one
+DEFAULT_IMAGE_PROFILES: dict[str, str] = {
+    "image/jpeg": "photo",
+    "image/png": "lossless",
+    "image/gif": "lossless",
+    "image/webp": "lossless",
+}
+IMAGE_PROFILE = os.getenv("IMAGE_UPVOTE_IMAGE_PROFILE")
+THUMBNAIL_PROFILE = PROFILES.get(os.getenv("IMAGE_UPVOTE_THUMBNAIL_PROFILE", "thumbnail"))
+if THUMBNAIL_PROFILE is None:
+    logger.warning(
+        f"Unknown IMAGE_UPVOTE_THUMBNAIL_PROFILE {os.getenv('IMAGE_UPVOTE_THUMBNAIL_PROFILE')!r}; "
+        f"using 'thumbnail'."
+    )
+    THUMBNAIL_PROFILE = PROFILES["thumbnail"]
+
+
+def select_profile(content_type: str, guild_setting: str | dict[str, str] | None = None) -> EncodingProfile:
+    """
+    Chooses the profile for an image. A guild setting wins over IMAGE_UPVOTE_IMAGE_PROFILE, which wins over
+    the default for the content type. Unknown or unsupported profiles fall back to ``lossless``.
+
+    :param content_type: The content type of the source image, e.g. ``"image/jpeg"``.
+    :type content_type: str
+    :param guild_setting: The ``media_encoding_profile`` of the guild config, either one profile name for
+        every image or a mapping from content type to profile name.
+    :type guild_setting: str | dict[str, str] | None
+    :return: The encoding profile.
+    :rtype: EncodingProfile
+    """
+    name: Optional[str] = None
+    if isinstance(guild_setting, dict):
+        name = guild_setting.get(content_type)
+    elif isinstance(guild_setting, str):
+        name = guild_setting
+    name = name or IMAGE_PROFILE or DEFAULT_IMAGE_PROFILES.get(content_type, "lossless")
+    profile = PROFILES.get(name)
+    if profile is None or not profile.is_supported():
+        return PROFILES["lossless"]
+    return profile
+
+
+def benchmark(paths: list[str]) -> None:
+    """Encodes every image with every supported profile and prints the encode time and output size."""
+    from dependencies.media_worker import transcode_image
+
+    # The time includes the thumbnail, which is the same for every profile
+    print(f"{'file':<32} {'profile':<10} {'time (ms)':>10} {'size (KB)':>10} {'of source':>10}")
+    for path in paths:
+        source_size = Path(path).stat().st_size
+        for profile in PROFILES.values():
+            if not profile.is_supported():
+                print(f"{Path(path).name[:32]:<32} {profile.name:<10} {'unsupported':>10}")
+                continue
+            started = time.perf_counter()
+            file_path, thumbnail_path, _ = transcode_image(path, profile, THUMBNAIL_PROFILE)
+            elapsed = (time.perf_counter() - started) * 1000
+            size = Path(file_path).stat().st_size
+            Path(file_path).unlink(missing_ok=True)
+            if thumbnail_path:
+                Path(thumbnail_path).unlink(missing_ok=True)
+            print(f"{Path(path).name[:32]:<32} {profile.name:<10} {elapsed:>10.1f} {size / 1024:>10.1f} "
+                  f"{size / source_size:>9.0%}")
+
+
+if __name__ == "__main__":
+    # python -m dependencies.encoding_profiles image.jpg animation.gif ...
+    if len(sys.argv) < 2:
+        print("Usage: python -m dependencies.encoding_profiles <image> [<image> ...]")
+        sys.exit(1)
+    benchmark(sys.argv[1:])
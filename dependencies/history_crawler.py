@@ -0,0 +1,300 @@
+import asyncio
+import datetime
+import os
+import time
+from typing import Awaitable, Callable, Optional
+
+import discord
+
+from dependencies.activity_store import CrawlStateStore
+from logger import LoggerManager
+
+logger = LoggerManager(name="Inactivity", level="INFO", log_file="logs/Inactivity.log").get_logger()
+
+# Number of channel histories fetched at the same time
+CRAWL_CONCURRENCY = int(os.getenv("INACTIVITY_CRAWL_CONCURRENCY", "5"))
+# Minimum seconds between two progress reports
+PROGRESS_INTERVAL = float(os.getenv("INACTIVITY_PROGRESS_INTERVAL", "2"))
+
+
+class HistoryCrawler:
+    """
+    Fetches the message history of every text channel, active thread and archived thread of a guild
+    concurrently and collects the most recent message time per member.
+
+    At most ``concurrency`` history requests are in flight at any time. discord.py already waits on the
+    per-route rate limit buckets (history is bucketed per channel) and retries on 429s, so the semaphore only
+    has to keep the crawler from flooding the global limit; wall-clock time then depends on the rate limit
+    instead of the number of channels.
+
+    :param guild: The guild to crawl.
+    :type guild: discord.Guild
+    :param after: Only messages after this time are fetched.
+    :type after: datetime.datetime
+    :param before: Only messages before this time are fetched. ``None`` means up to the start of the crawl.
+    :type before: datetime.datetime | None
+    :param progress: Coroutine called with the crawler to report progress. Calls are throttled.
+    :type progress: Callable[[HistoryCrawler], Awaitable[None]] | None
+    :param concurrency: The maximum number of history requests in flight.
+    :type concurrency: int
+    :param pending: Enables the early-termination mode. The members whose activity is still unconfirmed;
+        every member seen writing is removed. Channels none of the remaining members can view are skipped,
+        and the crawl stops as soon as no member is left. The results are then incomplete for members that
+        were already confirmed, which is reported by :attr:`terminated_early`.
+    :type pending: dict[int, discord.Member] | None
+    :param state: Per-channel crawl watermarks. When given, only history outside the already scanned range of
+        each channel is fetched, and the results include the user times stored from earlier runs.
+    :type state: CrawlStateStore | None
+    """
+
+    def __init__(
+            self,
+            guild: discord.Guild,
+            after: datetime.datetime,
+            before: Optional[datetime.datetime] = None,
+            progress: Optional[Callable[["HistoryCrawler"], Awaitable[None]]] = None,
+            concurrency: int = CRAWL_CONCURRENCY,
+            pending: Optional[dict[int, discord.Member]] = None,
+            state: Optional[CrawlStateStore] = None,
+    ) -> None:
+        self.guild = guild
+        self.after = after
+        self.before = before or datetime.datetime.now(datetime.timezone.utc)
+        self.state = state
+        self.progress = progress
+        self.results: dict[int, datetime.datetime] = {}
+        self.message_count: int = 0
+        self.api_calls: int = 0
+        self.completed: int = 0
+        self.total: int = 0
+        self.failed: bool = False
+        self.pending: Optional[dict[int, discord.Member]] = pending
+        self.skipped: int = 0
+        self.terminated_early: bool = False
+        # Pending members grouped by owner flag and role IDs, and the groups that can view each channel
+        self._audiences: Optional[dict[tuple[bool, frozenset[int]], dict[int, discord.Member]]] = None
+        self._channel_viewers: dict[int, tuple[list[dict[int, discord.Member]], set[int]]] = {}
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._last_report: float = 0.0
+        self._reporting: bool = False
+
+    async def run(self) -> dict[int, datetime.datetime]:
+        """
+        Crawls every readable channel of the guild and returns the last message time per member.
+
+        :return: The most recent message time per member ID.
+        :rtype: dict[int, datetime.datetime]
+        """
+        channels = list(self.guild.text_channels)
+        self.total = len(channels)
+        if self.state is not None:
+            # Members already seen in the scanned ranges of earlier runs need no crawling
+            for user_id, created_at in self.state.user_times(self.guild.id, self.after).items():
+                if user_id not in self.results or created_at > self.results[user_id]:
+                    self.results[user_id] = created_at
+                if self.pending is not None:
+                    self.pending.pop(user_id, None)
+        if self.pending is not None and not self.pending:
+            self.terminated_early = True
+            return self.results
+        await asyncio.gather(*(self._crawl_channel(channel) for channel in channels))
+        await self._report_progress(force=True)
+        return self.results
+
+    def _is_done(self) -> bool:
+        return self.pending is not None and not self.pending
+
+    def _is_relevant(self, target: discord.TextChannel | discord.Thread) -> bool:
+        """
+        In early-termination mode a channel only matters if a still unconfirmed member can see it. Threads are
+        visible to whoever can see their parent channel.
+
+        Members with the same roles see the same channels, so permissions are resolved once per role set and
+        channel instead of once per member. Only members with their own overwrite on the channel are resolved
+        individually.
+        """
+        if self.pending is None:
+            return True
+        channel = target.parent if isinstance(target, discord.Thread) else target
+        if channel is None:
+            return True
+        groups, direct = self._viewers(channel)
+        for member_id in direct:
+            member = self.pending.get(member_id)
+            if member is not None and channel.permissions_for(member).view_channel:
+                return True
+        return any(self._has_pending(members, direct) for members in groups)
+
+    def _viewers(self, channel: discord.TextChannel) -> tuple[list[dict[int, discord.Member]], set[int]]:
+        # The member groups that can view the channel, and the members with an overwrite of their own on it
+        cached = self._channel_viewers.get(channel.id)
+        if cached is not None:
+            return cached
+        if self._audiences is None:
+            self._audiences = {}
+            for member in self.pending.values():
+                signature = (member.id == self.guild.owner_id, frozenset(role.id for role in member.roles))
+                self._audiences.setdefault(signature, {})[member.id] = member
+        direct = {target.id for target in channel.overwrites if not isinstance(target, discord.Role)}
+        groups: list[dict[int, discord.Member]] = []
+        for members in self._audiences.values():
+            representative = next((member for member_id, member in members.items() if member_id not in direct), None)
+            if representative is not None and channel.permissions_for(representative).view_channel:
+                groups.append(members)
+        self._channel_viewers[channel.id] = groups, direct
+        return groups, direct
+
+    def _has_pending(self, members: dict[int, discord.Member], excluded: set[int]) -> bool:
+        # Confirmed members are dropped from the group on the way, so each is only skipped once per crawl
+        confirmed: list[int] = []
+        found = False
+        for member_id in members:
+            if member_id not in self.pending:
+                confirmed.append(member_id)
+            elif member_id not in excluded:
+                found = True
+                break
+        for member_id in confirmed:
+            del members[member_id]
+        return found
+
+    def _is_recent(self, thread: discord.Thread) -> bool:
+        if not thread.last_message_id:
+            return False
+        return discord.utils.snowflake_time(thread.last_message_id) >= self.after
+
+    async def _crawl_channel(self, channel: discord.TextChannel) -> None:
+        if not channel.permissions_for(self.guild.me).read_message_history:
+            logger.warning(f"Bot lacks 'Read Message History' in {channel.name}")
+            self.completed += 1
+            await self._report_progress()
+            return
+
+        threads = [thread for thread in channel.threads if self._is_recent(thread)]
+        self.total += len(threads)
+        tasks = [self._crawl_target(channel)] + [self._crawl_target(thread) for thread in threads]
+        tasks.append(self._crawl_archived_threads(channel))
+        await asyncio.gather(*tasks)
+
+    async def _crawl_archived_threads(self, channel: discord.TextChannel) -> None:
+        threads: list[discord.Thread] = []
+        try:
+            async with self._semaphore:
+                if self._is_done():
+                    self.terminated_early = True
+                    return
+                if not self._is_relevant(channel):
+                    # Threads are visible to whoever can see the channel, so none of them has to be listed
+                    self.terminated_early = True
+                    self.skipped += 1
+                    await self._report_progress()
+                    return
+                self.api_calls += 1
+                async for thread in channel.archived_threads(limit=None):
+                    if not self._is_recent(thread):
+                        break
+                    threads.append(thread)
+        except discord.HTTPException as e:
+            self.failed = True
+            logger.warning(f"Failed to list archived threads of {channel.name}: {e}")
+        self.total += len(threads)
+        await asyncio.gather(*(self._crawl_target(thread) for thread in threads))
+
+    def _ranges_to_fetch(self, target_id: int) -> list[tuple[object, datetime.datetime, bool]]:
+        """
+        Returns the ``(after, before, is_tail)`` ranges of a channel that still have to be fetched. Without
+        crawl state that is the whole window. With state, only the part before the scanned range and the part
+        after the watermark are fetched. A watermark older than the window is continued from as well, so the
+        scanned range and its user times are kept instead of starting over, unless the gap up to the window is
+        longer than the window itself. Restarting keeps the user times either way.
+        """
+        if self.state is None:
+            return [(self.after, self.before, False)]
+        state = self.state.channel(self.guild.id, target_id)
+        watermark = state["watermark"]
+        if state["from"] is None or (
+                watermark is not None
+                and self.after - discord.utils.snowflake_time(watermark) > self.before - self.after):
+            self.state.restart(self.guild.id, target_id, self.after)
+            return [(self.after, self.before, True)]
+        ranges: list[tuple[object, datetime.datetime, bool]] = []
+        if self.after < state["from"]:
+            ranges.append((self.after, min(state["from"], self.before), False))
+        if watermark is None:
+            ranges.append((max(self.after, state["from"]), self.before, True))
+        elif watermark < discord.utils.time_snowflake(self.before):
+            ranges.append((discord.Object(id=watermark), self.before, True))
+        return ranges
+
+    async def _crawl_target(self, target: discord.abc.Messageable) -> None:
+        try:
+            async with self._semaphore:
+                if self._is_done() or not self._is_relevant(target):
+                    self.terminated_early = True
+                    self.skipped += 1
+                    self.completed += 1
+                    await self._report_progress()
+                    return
+                for after, before, is_tail in self._ranges_to_fetch(target.id):
+                    if not await self._fetch_range(target, after, before, is_tail):
+                        # The crawl terminated; the remaining ranges are not needed either
+                        break
+                    if self.state is None:
+                        continue
+                    if is_tail:
+                        # Everything up to the end of the range has been scanned, even without messages
+                        self.state.advance(self.guild.id, target.id,
+                                           discord.utils.time_snowflake(before) - 1, None, before)
+                    elif before >= self.state.channel(self.guild.id, target.id)["from"]:
+                        # The range reached the scanned one, so both are contiguous now
+                        self.state.extend_from(self.guild.id, target.id, after)
+        except discord.HTTPException as e:
+            self.failed = True
+            logger.warning(f"Failed to fetch history for {getattr(target, 'name', 'unknown')}: {e}")
+        self.completed += 1
+        await self._report_progress()
+
+    async def _fetch_range(self, target: discord.abc.Messageable, after: object, before: datetime.datetime,
+                           is_tail: bool) -> bool:
+        """
+        Reads the history of ``target`` between ``after`` and ``before``. Returns False if the crawl stopped
+        early. While reading the tail range, the watermark of the target advances with every message.
+        """
+        self.api_calls += 1
+        count = 0
+        async for message in target.history(limit=None, after=after, before=before):
+            if self._is_done():
+                self.terminated_early = True
+                return False
+            count += 1
+            if count % 100 == 0:
+                self.api_calls += 1
+            author = message.author
+            is_member = isinstance(author, discord.Member) and not author.bot
+            if self.state is not None:
+                if is_tail:
+                    self.state.advance(self.guild.id, target.id, message.id,
+                                       author.id if is_member else None, message.created_at)
+                elif is_member:
+                    self.state.advance_users(self.guild.id, target.id, author.id, message.created_at)
+            if not is_member:
+                continue
+            self.message_count += 1
+            if author.id not in self.results or message.created_at > self.results[author.id]:
+                self.results[author.id] = message.created_at
+            if self.pending is not None:
+                self.pending.pop(author.id, None)
+        return True
+
+    async def _report_progress(self, force: bool = False) -> None:
+        if self.progress is None or self._reporting:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._reporting = True
+        try:
+            self._last_report = now
+            await self.progress(self)
+        finally:
+            self._reporting = False
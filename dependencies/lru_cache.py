@@ -0,0 +1,48 @@
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A dictionary with a maximum size that drops the least recently used entry when it is full.
+
+    :param max_size: The maximum number of entries.
+    :type max_size: int
+    :param on_evict: Called with the key and value of every entry that is dropped to make room.
+    :type on_evict: Callable[[K, V], None] | None
+    """
+
+    def __init__(self, max_size: int, on_evict: Optional[Callable[[K, V], None]] = None) -> None:
+        self.max_size = max(1, max_size)
+        self.on_evict = on_evict
+        self._entries: OrderedDict[K, V] = OrderedDict()
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Returns the value of ``key`` and marks it as recently used."""
+        if key not in self._entries:
+            return default
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            evicted_key, evicted_value = self._entries.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(evicted_key, evicted_value)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        return self._entries.pop(key, default)
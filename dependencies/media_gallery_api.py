@@ -0,0 +1,181 @@
+import asyncio
+import base64
+import contextlib
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Iterator, Optional
+
+import asyncpg
+import uvicorn
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+
+from logger import LoggerManager
+
+# Off by default; with the default host the API is only reachable from the machine the bot runs on. In
+# docker-compose IMAGE_UPVOTE_API_HOST has to be 0.0.0.0 for the port mapping to reach it
+API_ENABLED = os.getenv("IMAGE_UPVOTE_API_ENABLED", "false").lower() in {"1", "true", "yes"}
+API_HOST = os.getenv("IMAGE_UPVOTE_API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("IMAGE_UPVOTE_API_PORT", "8000"))
+# Comma separated origins allowed to call the API from a browser; none unless configured
+API_CORS_ORIGINS = [origin.strip() for origin in os.getenv("IMAGE_UPVOTE_API_CORS_ORIGINS", "").split(",")
+                    if origin.strip()]
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+logger = LoggerManager(name="ImageUpvote", level="INFO", log_file="logs/ImageUpvote.log").get_logger()
+
+
+def encode_cursor(date_of_upload: datetime, file_id: uuid.UUID) -> str:
+    raw = f"{date_of_upload.isoformat()}|{file_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    date_text, file_id = raw.split("|", 1)
+    return datetime.fromisoformat(date_text), uuid.UUID(file_id)
+
+
+def _serialize(record: asyncpg.Record) -> dict[str, Any]:
+    return {
+        "file_id": str(record["file_id"]),
+        "filename": record["filename"],
+        "file_url": record["file_path"],
+        "thumbnail_url": record["thumbnail_path"],
+        "file_format": record["file_format"],
+        "creator_name": record["creator_name"],
+        "uploaded_by": record["uploaded_by"],
+        "date_of_upload": record["date_of_upload"].isoformat(),
+    }
+
+
+def create_gallery_api(get_pool: Callable[[], Optional[asyncpg.Pool]], table: str) -> FastAPI:
+    """
+    Creates the read-only gallery API over the media uploads table.
+
+    Pages are ordered newest first and continue with a keyset cursor on ``(date_of_upload, file_id)``, so every
+    page is a range scan on the matching index no matter how deep the client pages.
+
+    :param get_pool: Returns the current database pool, or None while it is unavailable.
+    :type get_pool: Callable[[], Optional[asyncpg.Pool]]
+    :param table: The name of the media uploads table.
+    :type table: str
+    :return: The FastAPI application.
+    :rtype: FastAPI
+    """
+    api = FastAPI(title="Based media gallery", docs_url=None, redoc_url=None)
+    api.add_middleware(CORSMiddleware, allow_origins=API_CORS_ORIGINS, allow_methods=["GET"])
+    columns = "file_id, filename, file_path, thumbnail_path, file_format, creator_name, uploaded_by, date_of_upload"
+
+    def _pool() -> asyncpg.Pool:
+        pool = get_pool()
+        if pool is None:
+            raise HTTPException(status_code=503, detail="Database is not available.")
+        return pool
+
+    @api.get("/media")
+    async def list_media(
+            limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+            cursor: Optional[str] = None,
+            creator: Optional[str] = None,
+            file_format: Optional[str] = Query(None, alias="format"),
+    ) -> dict[str, Any]:
+        conditions: list[str] = []
+        args: list[Any] = []
+        if cursor:
+            try:
+                cursor_date, cursor_id = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor.")
+            args.extend([cursor_date, cursor_id])
+            conditions.append(f"(date_of_upload, file_id) < (${len(args) - 1}, ${len(args)})")
+        if creator:
+            args.append(creator)
+            conditions.append(f"creator_name = ${len(args)}")
+        if file_format:
+            # Stored with the leading dot, e.g. ".webp"
+            args.append(file_format if file_format.startswith(".") else f".{file_format}")
+            conditions.append(f"file_format = ${len(args)}")
+        # One extra row tells whether there is a next page
+        args.append(limit + 1)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        async with _pool().acquire() as connection:
+            records = await connection.fetch(
+                f"""
+                SELECT {columns}
+                FROM {table}
+                {where}
+                ORDER BY date_of_upload DESC, file_id DESC
+                LIMIT ${len(args)}
+                """,
+                *args,
+            )
+        items = records[:limit]
+        next_cursor = None
+        if len(records) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last["date_of_upload"], last["file_id"])
+        return {"items": [_serialize(record) for record in items], "next_cursor": next_cursor}
+
+    @api.get("/media/{file_id}")
+    async def get_media(file_id: uuid.UUID) -> dict[str, Any]:
+        async with _pool().acquire() as connection:
+            record = await connection.fetchrow(f"SELECT {columns} FROM {table} WHERE file_id=$1", file_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="No media entry found for that file_id.")
+        return _serialize(record)
+
+    return api
+
+
+class _EmbeddedServer(uvicorn.Server):
+    # The bot owns the process signals; the server is stopped through should_exit instead
+    @contextlib.contextmanager
+    def capture_signals(self) -> Iterator[None]:
+        yield
+
+    def install_signal_handlers(self) -> None:
+        pass
+
+
+class GalleryApiServer:
+    """
+    Runs the gallery API with uvicorn on the bot's event loop.
+
+    :param app: The FastAPI application.
+    :type app: FastAPI
+    :param host: The address to listen on.
+    :type host: str
+    :param port: The port to listen on.
+    :type port: int
+    """
+
+    def __init__(self, app: FastAPI, host: str = API_HOST, port: int = API_PORT) -> None:
+        self._server = _EmbeddedServer(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._serve())
+
+    async def _serve(self) -> None:
+        logger.info(f"Starting gallery API on {self._server.config.host}:{self._server.config.port}.")
+        try:
+            await self._server.serve()
+        except SystemExit:
+            # uvicorn exits the process when it can't bind; the bot has to keep running
+            logger.error("Gallery API failed to start; is the port already in use?")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._server.should_exit = True
+        try:
+            await asyncio.wait_for(self._task, timeout=10)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._task.cancel()
+        except Exception:
+            logger.exception("Gallery API stopped with an error")
+        self._task = None
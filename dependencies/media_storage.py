@@ -0,0 +1,269 @@
+import asyncio
+import io
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+from logger import LoggerManager
+
+# Storage backend for uploaded media: "s3" or "local"
+STORAGE_BACKEND = os.getenv("IMAGE_UPVOTE_STORAGE", "s3").lower()
+S3_ENDPOINT = os.getenv("IMAGE_UPVOTE_S3_ENDPOINT")
+S3_BUCKET = os.getenv("IMAGE_UPVOTE_S3_BUCKET")
+S3_ACCESS_KEY = os.getenv("IMAGE_UPVOTE_S3_ACCESS_KEY")
+S3_SECRET_KEY = os.getenv("IMAGE_UPVOTE_S3_SECRET_KEY")
+S3_REGION = os.getenv("IMAGE_UPVOTE_S3_REGION")
+# Threads reserved for S3 calls, so uploads don't compete with asyncio.to_thread users
+S3_THREADS = int(os.getenv("IMAGE_UPVOTE_S3_THREADS", "8"))
+# Files larger than this are uploaded in parts of S3_CHUNK_SIZE_MB, S3_MAX_CONCURRENCY parts at a time
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("IMAGE_UPVOTE_S3_MULTIPART_THRESHOLD_MB", "16"))
+S3_CHUNK_SIZE_MB = int(os.getenv("IMAGE_UPVOTE_S3_CHUNK_SIZE_MB", "16"))
+S3_MAX_CONCURRENCY = int(os.getenv("IMAGE_UPVOTE_S3_MAX_CONCURRENCY", "4"))
+# DeleteObjects accepts at most this many keys per request
+S3_DELETE_BATCH_SIZE = 1000
+# Directory served by the based-cdn nginx container, and the URL it is served under
+LOCAL_STORAGE_DIR = os.getenv("IMAGE_UPVOTE_LOCAL_DIR", "cdn/Uploads")
+LOCAL_STORAGE_URL = os.getenv("IMAGE_UPVOTE_LOCAL_URL", "http://localhost/Uploads")
+
+# Media is either a temp file or, when small enough, the bytes themselves
+MediaData = Path | bytes
+
+logger = LoggerManager(name="ImageUpvote", level="INFO", log_file="logs/ImageUpvote.log").get_logger()
+
+
+class MediaStorage(ABC):
+    """Where uploaded media files and thumbnails are stored and under which URL they are served."""
+
+    name: str = ""
+
+    @abstractmethod
+    async def upload(self, source: MediaData, key: str, content_type: str) -> str:
+        """
+        Stores a file under ``key``.
+
+        :param source: The file or its bytes.
+        :type source: MediaData
+        :param key: The object key, e.g. ``"thumbnails/<stem>.webp"``.
+        :type key: str
+        :param content_type: The MIME type of the file.
+        :type content_type: str
+        :return: The public URL of the stored file.
+        :rtype: str
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Deletes the file stored under ``key``. Missing files are not an error."""
+
+    async def delete_many(self, keys: list[str]) -> dict[str, Optional[str]]:
+        """
+        Deletes several files.
+
+        :param keys: The keys to delete.
+        :type keys: list[str]
+        :return: The error message per key, or None for keys that were deleted.
+        :rtype: dict[str, Optional[str]]
+        """
+        results: dict[str, Optional[str]] = {}
+        for key in keys:
+            try:
+                await self.delete(key)
+                results[key] = None
+            except Exception as exc:
+                results[key] = str(exc)
+        return results
+
+    @abstractmethod
+    def key_from_url(self, url: Optional[str]) -> Optional[str]:
+        """Returns the key of a URL returned by :meth:`upload`, or None if it can't be determined."""
+
+    async def close(self) -> None:
+        """Releases the resources of the backend."""
+
+
+class S3MediaStorage(MediaStorage):
+    """
+    Stores media in an S3 compatible bucket.
+
+    All S3 calls run on a dedicated thread pool of ``S3_THREADS`` threads. Large files are uploaded as
+    multipart uploads with several parts in flight, and the client's connection pool is sized for all of them,
+    so keep-alive connections are reused instead of reopened.
+    """
+
+    name = "S3"
+
+    def __init__(self, endpoint: str, bucket: str, access_key: str, secret_key: str,
+                 region: Optional[str] = None) -> None:
+        threads = max(1, S3_THREADS)
+        max_concurrency = max(1, S3_MAX_CONCURRENCY)
+        session = boto3.session.Session()
+        self.client = session.client(
+            "s3",
+            endpoint_url=endpoint,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            region_name=region,
+            config=Config(max_pool_connections=threads * max_concurrency),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+            multipart_chunksize=S3_CHUNK_SIZE_MB * 1024 * 1024,
+            max_concurrency=max_concurrency,
+        )
+        self.bucket = bucket
+        self.url_prefix = f"{endpoint.rstrip('/')}/{bucket.strip('/')}"
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="s3-transfer")
+
+    async def _run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    async def upload(self, source: MediaData, key: str, content_type: str) -> str:
+        extra_args = {"ContentType": content_type} if content_type else None
+        size = len(source) if isinstance(source, bytes) else source.stat().st_size
+        started = time.perf_counter()
+        if isinstance(source, bytes):
+            await self._run(self.client.upload_fileobj, io.BytesIO(source), self.bucket, key,
+                            ExtraArgs=extra_args, Config=self.transfer_config)
+        else:
+            await self._run(self.client.upload_file, str(source), self.bucket, key,
+                            ExtraArgs=extra_args, Config=self.transfer_config)
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Uploaded {key} ({size / (1024 * 1024):.2f} MB) in {elapsed:.2f}s, "
+            f"{size / (1024 * 1024) / max(elapsed, 1e-6):.2f} MB/s"
+        )
+        return f"{self.url_prefix}/{key}"
+
+    async def delete(self, key: str) -> None:
+        await self._run(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    async def delete_many(self, keys: list[str]) -> dict[str, Optional[str]]:
+        results: dict[str, Optional[str]] = {}
+        for start in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+            batch = keys[start:start + S3_DELETE_BATCH_SIZE]
+            try:
+                # Quiet mode only reports the keys that could not be deleted
+                response = await self._run(
+                    self.client.delete_objects,
+                    Bucket=self.bucket,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+            except Exception as exc:
+                results.update({key: str(exc) for key in batch})
+                continue
+            results.update({key: None for key in batch})
+            for error in response.get("Errors", []):
+                results[error["Key"]] = f"{error.get('Code', 'Error')}: {error.get('Message', '')}".strip()
+        return results
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._executor.shutdown, True)
+
+    def key_from_url(self, url: Optional[str]) -> Optional[str]:
+        if not url:
+            return None
+        prefix = self.url_prefix.rstrip("/") + "/"
+        if url.startswith(prefix):
+            return url[len(prefix):]
+        path = urlparse(url).path.lstrip("/")
+        bucket = self.bucket.strip("/")
+        if path.startswith(f"{bucket}/"):
+            path = path[len(bucket) + 1:]
+        return path or None
+
+
+class LocalMediaStorage(MediaStorage):
+    """
+    Stores media in a local directory, by default the ``cdn/Uploads`` directory served by the based-cdn container.
+
+    :param root: The directory files are written to.
+    :type root: str
+    :param base_url: The URL the directory is served under.
+    :type base_url: str
+    """
+
+    name = "local storage"
+
+    def __init__(self, root: str = LOCAL_STORAGE_DIR, base_url: str = LOCAL_STORAGE_URL) -> None:
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path_for(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Key {key!r} points outside of {self.root}")
+        return path
+
+    async def upload(self, source: MediaData, key: str, content_type: str) -> str:
+        target = self._path_for(key)
+
+        def _write() -> None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Written next to the target and renamed, so nginx never serves a partial file
+            fd, temp_path = tempfile.mkstemp(dir=target.parent, suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    if isinstance(source, bytes):
+                        file.write(source)
+                    else:
+                        with open(source, "rb") as source_file:
+                            while chunk := source_file.read(1024 * 1024):
+                                file.write(chunk)
+                os.chmod(temp_path, 0o644)
+                os.replace(temp_path, target)
+            except BaseException:
+                Path(temp_path).unlink(missing_ok=True)
+                raise
+
+        await asyncio.to_thread(_write)
+        return f"{self.base_url}/{key}"
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._path_for(key).unlink, missing_ok=True)
+
+    def key_from_url(self, url: Optional[str]) -> Optional[str]:
+        if not url:
+            return None
+        prefix = self.base_url + "/"
+        if url.startswith(prefix):
+            return url[len(prefix):] or None
+        return None
+
+
+def create_storage() -> Optional[MediaStorage]:
+    """
+    Creates the storage backend selected by IMAGE_UPVOTE_STORAGE.
+
+    :return: The storage backend, or None if it is not configured.
+    :rtype: MediaStorage | None
+    """
+    if STORAGE_BACKEND == "local":
+        try:
+            storage = LocalMediaStorage()
+        except OSError:
+            logger.exception("Failed to prepare local media storage")
+            return None
+        logger.info(f"Local media storage initialised at {storage.root}.")
+        return storage
+
+    if not all([S3_ENDPOINT, S3_BUCKET, S3_ACCESS_KEY, S3_SECRET_KEY]):
+        logger.error("S3 configuration is incomplete; uploads will be skipped.")
+        return None
+    try:
+        storage = S3MediaStorage(S3_ENDPOINT, S3_BUCKET, S3_ACCESS_KEY, S3_SECRET_KEY, S3_REGION)
+    except Exception:
+        logger.exception("Failed to initialise S3 client")
+        return None
+    logger.info("S3 client initialised for image upvotes.")
+    return storage
@@ -0,0 +1,178 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from PIL import Image, ImageSequence
+
+from dependencies.encoding_profiles import EncodingProfile
+from logger import LoggerManager
+
+# Number of worker processes that transcode media
+MEDIA_WORKERS = int(os.getenv("IMAGE_UPVOTE_MEDIA_WORKERS", "2"))
+# Maximum number of jobs running or waiting for a worker before new jobs are rejected
+MEDIA_QUEUE_DEPTH = int(os.getenv("IMAGE_UPVOTE_MEDIA_QUEUE_DEPTH", "16"))
+
+logger = LoggerManager(name="ImageUpvote", level="INFO", log_file="logs/ImageUpvote.log").get_logger()
+
+
+class MediaQueueFull(RuntimeError):
+    """Raised when the media worker service already has ``queue_depth`` jobs in flight."""
+
+
+def _timed_call(func: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    # Runs in the worker process so the measured time excludes waiting for a free worker
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def _output(extension: str, in_memory: bool) -> str | io.BytesIO:
+    if in_memory:
+        return io.BytesIO()
+    fd, file_path = tempfile.mkstemp(suffix=extension)
+    os.close(fd)
+    return file_path
+
+
+def _result(output: str | io.BytesIO) -> str | bytes:
+    return output.getvalue() if isinstance(output, io.BytesIO) else output
+
+
+def _save_animated(img: Image.Image, output: str | io.BytesIO, profile: EncodingProfile) -> None:
+    # Reading the durations only seeks through the frames; none of them is kept
+    durations = [
+        int(frame.info.get("duration", img.info.get("duration", 0)) or 0)
+        for frame in ImageSequence.Iterator(img)
+    ]
+    img.seek(0)
+    save_kwargs: dict[str, Any] = {
+        **profile.save_options(),
+        "save_all": True,
+        "loop": img.info.get("loop", 0),
+        "duration": durations,
+    }
+    width, height = img.size
+    if not profile.max_size or (width <= profile.max_size[0] and height <= profile.max_size[1]):
+        # The encoder seeks through the source itself and converts one frame at a time
+        img.save(output, **save_kwargs)
+        return
+    # Downscaling needs converted copies; only the already shrunken frames are kept
+    frames = []
+    for frame in ImageSequence.Iterator(img):
+        converted_frame = frame.convert("RGBA")
+        converted_frame.thumbnail(profile.max_size)
+        frames.append(converted_frame)
+    frames[0].save(output, append_images=frames[1:], **save_kwargs)
+
+
+def transcode_image(
+        source: str | bytes,
+        profile: EncodingProfile,
+        thumbnail_profile: EncodingProfile,
+        in_memory: bool = False,
+) -> tuple[str | bytes, Optional[str | bytes], str]:
+    """
+    Encodes an image with ``profile`` and creates a thumbnail with ``thumbnail_profile``.
+
+    Runs inside a worker process, so it must only use picklable arguments and return values.
+
+    :param source: The path of the source image, or its bytes.
+    :type source: str | bytes
+    :param profile: The encoding profile of the image.
+    :type profile: EncodingProfile
+    :param thumbnail_profile: The encoding profile of the thumbnail.
+    :type thumbnail_profile: EncodingProfile
+    :param in_memory: Whether to return the encoded bytes instead of writing temporary files.
+    :type in_memory: bool
+    :return: The converted image and the thumbnail (paths or bytes) and the file extension.
+    :rtype: tuple[str | bytes, Optional[str | bytes], str]
+    """
+    with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+        output = _output(profile.extension, in_memory)
+
+        if getattr(img, "is_animated", False):
+            _save_animated(img, output, profile)
+            img.seek(0)
+            base_frame = img.convert("RGBA")
+        else:
+            converted = img.convert("RGBA") if img.mode not in {"RGB", "RGBA"} else img.copy()
+            if profile.max_size:
+                converted.thumbnail(profile.max_size)
+            converted.save(output, **profile.save_options())
+            base_frame = converted
+
+        thumbnail_output = _output(thumbnail_profile.extension, in_memory)
+        thumb_image = base_frame.copy()
+        thumb_image.thumbnail(thumbnail_profile.max_size or (512, 512))
+        thumb_image.save(thumbnail_output, **thumbnail_profile.save_options())
+        return _result(output), _result(thumbnail_output), profile.extension
+
+
+class MediaWorkerService:
+    """
+    Runs CPU-heavy media transcoding in a bounded pool of worker processes, off the event loop.
+
+    At most ``workers`` jobs run at the same time. Further jobs wait for a free worker, up to ``queue_depth``
+    jobs in flight overall; beyond that :meth:`run` raises :class:`MediaQueueFull` instead of queueing
+    unbounded work. Every job logs how long it waited for a worker and how long it ran.
+
+    :param workers: The number of worker processes.
+    :type workers: int
+    :param queue_depth: The maximum number of jobs running or waiting.
+    :type queue_depth: int
+    """
+
+    def __init__(self, workers: int = MEDIA_WORKERS, queue_depth: int = MEDIA_QUEUE_DEPTH) -> None:
+        self.workers = max(1, workers)
+        self.queue_depth = max(self.workers, queue_depth)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+
+    def start(self) -> None:
+        if self._executor is None:
+            # Spawned workers don't inherit the bot's event loop, sockets or threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"Media worker pool started with {self.workers} workers (queue depth {self.queue_depth}).")
+
+    async def shutdown(self) -> None:
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
+    async def run(self, job_name: str, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs ``func(*args)`` in a worker process and returns its result.
+
+        :param job_name: A short description of the job for the timing log.
+        :type job_name: str
+        :param func: A module-level (picklable) function.
+        :type func: Callable[..., Any]
+        :raises MediaQueueFull: If ``queue_depth`` jobs are already in flight.
+        :return: The return value of ``func``.
+        """
+        if self._executor is None:
+            self.start()
+        if self._in_flight >= self.queue_depth:
+            raise MediaQueueFull(f"Media worker queue is full ({self._in_flight} jobs in flight)")
+
+        self._in_flight += 1
+        queued_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_time = await loop.run_in_executor(self._executor, _timed_call, func, *args)
+        finally:
+            self._in_flight -= 1
+        total_time = time.perf_counter() - queued_at
+        logger.info(
+            f"Media job {job_name} took {total_time:.2f}s (waited {max(0.0, total_time - run_time):.2f}s, "
+            f"ran {run_time:.2f}s, {self._in_flight} jobs still in flight)"
+        )
+        return result
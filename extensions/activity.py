@@ -1,26 +1,180 @@
+import asyncio
+import csv
 import datetime
+import io
 import json
 import os
-from typing import Any
+import tempfile
+from typing import Any, Awaitable, Callable, Iterable, Iterator
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
+from dependencies.activity_store import CrawlStateStore, MessageIndex, VoiceActivityStore
+from dependencies.history_crawler import HistoryCrawler
 from logger import LoggerManager
 
 # Initialize the logger
 logger = LoggerManager(name="Inactivity", level="INFO", log_file="logs/Inactivity.log").get_logger()
 
+# Seconds between two write-behind flushes of the voice activity store
+ACTIVITY_FLUSH_INTERVAL = int(os.getenv("ACTIVITY_FLUSH_INTERVAL", "60"))
+# Off-peak UTC window ("HH:MM-HH:MM") for precomputing inactivity reports, empty to disable
+INACTIVITY_PRECOMPUTE_WINDOW = os.getenv("INACTIVITY_PRECOMPUTE_WINDOW", "03:00-05:00")
+# Hours a precomputed inactivity report is returned without recomputing it
+INACTIVITY_REPORT_MAX_AGE = int(os.getenv("INACTIVITY_REPORT_MAX_AGE", "24"))
+# The windows (in days) offered by /inactivity_check and precomputed in the background
+INACTIVITY_REPORT_DAYS = (30, 60, 90)
+# Columns of exported inactivity reports
+REPORT_FIELDS = ["user_id", "name", "display_name", "voice_hours", "voice_minutes", "voice_connections"]
+
+
+# Maximum length of an embed field value
+EMBED_FIELD_LIMIT = 1024
+
+
+def iter_report_rows(inactive_users: list) -> Iterator[dict[str, Any]]:
+    """
+    Yields one row per inactive member of an inactivity report.
+
+    :param inactive_users: The inactive members as ``(member, hours, minutes, connections)`` tuples.
+    :type inactive_users: list
+    :return: A generator of rows with the member and voice statistics.
+    :rtype: Iterator[dict[str, Any]]
+    """
+    for member, hours, minutes, connections in inactive_users:
+        yield {
+            "user_id": member.id,
+            "name": member.name,
+            "display_name": member.display_name,
+            "voice_hours": hours,
+            "voice_minutes": minutes,
+            "voice_connections": connections,
+        }
+
+
+def format_report_row(row: dict[str, Any]) -> str:
+    if row["voice_hours"] > 0 or row["voice_minutes"] > 0 or row["voice_connections"] > 0:
+        return f"<@{row['user_id']}>   ⏱️ {row['voice_hours']}h {row['voice_minutes']}m   🔗 {row['voice_connections']}"
+    return f"<@{row['user_id']}>"
+
+
+def iter_report_pages(rows: Iterable[dict[str, Any]], limit: int = EMBED_FIELD_LIMIT) -> Iterator[str]:
+    """
+    Groups report rows into pages whose text fits into a single embed field.
+
+    :param rows: The report rows.
+    :type rows: Iterable[dict[str, Any]]
+    :param limit: The maximum length of a page.
+    :type limit: int
+    :return: A generator of page texts.
+    :rtype: Iterator[str]
+    """
+    lines: list[str] = []
+    length = 0
+    for row in rows:
+        line = format_report_row(row)
+        if lines and length + len(line) + 1 > limit:
+            yield "\n".join(lines)
+            lines, length = [], 0
+        lines.append(line)
+        length += len(line) + 1
+    if lines:
+        yield "\n".join(lines)
+
+
+def export_report(rows: Iterable[dict[str, Any]], file_format: str, filename: str) -> discord.File:
+    """
+    Writes report rows one by one into a spooled temporary file and returns it as a Discord attachment.
+
+    Small reports stay in memory, larger ones spill over to disk, so no single string of the whole report
+    is ever built.
+
+    :param rows: The report rows.
+    :type rows: Iterable[dict[str, Any]]
+    :param file_format: Either ``"csv"`` or ``"json"``.
+    :type file_format: str
+    :param filename: The attachment name without extension.
+    :type filename: str
+    :return: The attachment.
+    :rtype: discord.File
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+b")
+    text = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+    if file_format == "csv":
+        writer = csv.DictWriter(text, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        text.write("[")
+        for index, row in enumerate(rows):
+            text.write(("," if index else "") + "\n  " + json.dumps(row))
+        text.write("\n]\n")
+    text.flush()
+    text.detach()
+    buffer.seek(0)
+    return discord.File(buffer, filename=f"{filename}.{file_format}")
+
+
+class InactivityReportView(discord.ui.View):
+    def __init__(self, interaction: discord.Interaction, build_embed: Callable[[str, int, int], discord.Embed],
+                 pages: list[str]):
+        super().__init__(timeout=600)
+        self.interaction = interaction
+        self.build_embed = build_embed
+        self.pages = pages
+        self.page = 0
+        self.message: discord.WebhookMessage | None = None
+        self.update_buttons()
+
+    def current_embed(self) -> discord.Embed:
+        return self.build_embed(self.pages[self.page], self.page + 1, len(self.pages))
+
+    def update_buttons(self) -> None:
+        self.previous.disabled = self.page == 0
+        self.next.disabled = self.page >= len(self.pages) - 1
+
+    async def turn_page(self, interaction: discord.Interaction, step: int) -> None:
+        if interaction.user != self.interaction.user:
+            await interaction.response.send_message("You are not allowed to use this.", ephemeral=True)  # noqa
+            return
+        self.page = max(0, min(len(self.pages) - 1, self.page + step))
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.current_embed(), view=self)  # noqa
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.grey, emoji="◀️")
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):  # noqa
+        await self.turn_page(interaction, -1)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.grey, emoji="▶️")
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):  # noqa
+        await self.turn_page(interaction, 1)
+
+    async def on_timeout(self) -> None:
+        if self.message:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
+
 
 class Inactivity(commands.Cog):
     def __init__(self, bot):
         self.bot: commands.Bot = bot
-        self.voice_channel_join_times: dict = {}
+        self.voice_channel_join_times: dict[tuple[int, int], datetime.datetime] = {}  # last credit per session
         self.active_guilds: list[int] = []
         self.excluded_roles: dict[int, list[int]] = {}
         self.included_users: dict[int, list[int]] = {}  # Dictionary to store included users per guild
-        self.inactivity_cache: dict[tuple[int, int], tuple[datetime.datetime, list]] = {}
+        self.eligible_members: dict[int, set[int]] = {}  # Tracked (non-bot, non-excluded) member IDs per guild
+        # Latest inactivity report per (guild, days), computed on demand or in the background
+        self.inactivity_reports: dict[tuple[int, int], tuple[datetime.datetime, list]] = {}
+        self.voice_store: VoiceActivityStore = VoiceActivityStore()
+        self.message_index: MessageIndex = MessageIndex()
+        self.crawl_state: CrawlStateStore = CrawlStateStore()
+        self.disconnected_at: datetime.datetime | None = None
+        self.flush_task: asyncio.Task | None = None
+        self.precompute_task: asyncio.Task | None = None
 
         # Ensure the activity folder exists
         if not os.path.exists('activity'):
@@ -29,6 +183,167 @@ class Inactivity(commands.Cog):
 
     async def cog_load(self):
         await self.load_active_guilds()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for guild in self.bot.guilds:
+            self.message_index.start_observing(guild.id, now)
+            self.rebuild_eligible_members(guild)
+        await self.reconcile_voice_sessions()
+        self.flush_task = self.bot.loop.create_task(self.flush_voice_activity())
+        if INACTIVITY_PRECOMPUTE_WINDOW:
+            self.precompute_task = self.bot.loop.create_task(self.precompute_inactivity_reports())
+
+    async def cog_unload(self):
+        if self.flush_task:
+            self.flush_task.cancel()
+        if self.precompute_task:
+            self.precompute_task.cancel()
+        self.credit_open_sessions()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for guild_id in self.message_index.observed_guilds():
+            self.message_index.stop_observing(guild_id, now)
+        await self.voice_store.flush()
+        await self.message_index.flush()
+        await self.crawl_state.flush()
+        logger.info("Flushed voice activity, message index and crawl state on unload")
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message) -> None:
+        """
+        Keeps the last-message index up to date so inactivity checks don't have to crawl channel history.
+
+        :param message: The message that was sent.
+        :type message: discord.Message
+        :return: None
+        """
+        if message.guild is None or message.author.bot or not isinstance(message.author, discord.Member):
+            return
+        self.message_index.record(message.guild.id, message.author.id, message.created_at)
+
+    def is_eligible(self, member: discord.Member) -> bool:
+        """
+        Evaluates whether a member is tracked: not a bot, and without an excluded role unless explicitly
+        included. Hot paths use the precomputed :attr:`eligible_members` sets instead.
+
+        :param member: The member to evaluate.
+        :type member: discord.Member
+        :return: True if the member is tracked.
+        :rtype: bool
+        """
+        if member.bot:
+            return False
+        guild_id = member.guild.id
+        if member.id in self.included_users.get(guild_id, []):
+            return True
+        excluded_roles = set(self.excluded_roles.get(guild_id, []))
+        return not any(role.id in excluded_roles for role in member.roles)
+
+    def rebuild_eligible_members(self, guild: discord.Guild) -> None:
+        """
+        Recomputes the set of tracked member IDs of a guild. Called on startup and whenever the excluded roles
+        or included users of the guild change. Cached inactivity reports of the guild are dropped if the set
+        changed.
+
+        :param guild: The guild to recompute.
+        :type guild: discord.Guild
+        :return: None
+        """
+        eligible = {member.id for member in guild.members if self.is_eligible(member)}
+        if eligible != self.eligible_members.get(guild.id):
+            self.invalidate_reports(guild.id)
+        self.eligible_members[guild.id] = eligible
+        self.end_voice_sessions(guild.id, [
+            member_id for session_guild_id, member_id in self.voice_channel_join_times
+            if session_guild_id == guild.id and member_id not in eligible
+        ])
+
+    def update_eligible_member(self, member: discord.Member) -> bool:
+        """
+        Adds or removes a single member from the tracked members of their guild.
+
+        :param member: The member to evaluate.
+        :type member: discord.Member
+        :return: True if the member started or stopped being tracked.
+        :rtype: bool
+        """
+        eligible = self.eligible_members.setdefault(member.guild.id, set())
+        was_eligible = member.id in eligible
+        if self.is_eligible(member):
+            eligible.add(member.id)
+        else:
+            eligible.discard(member.id)
+            self.end_voice_sessions(member.guild.id, [member.id])
+        return was_eligible != (member.id in eligible)
+
+    def invalidate_reports(self, guild_id: int) -> None:
+        # Reports list the tracked members, so they are stale once the tracked set changes
+        for key in [key for key in self.inactivity_reports if key[0] == guild_id]:
+            del self.inactivity_reports[key]
+
+    def end_voice_sessions(self, guild_id: int, member_ids: Iterable[int]) -> None:
+        """
+        Ends the open voice sessions of members that are no longer tracked. Their time up to now is still
+        credited, since they were tracked until now; afterward :meth:`credit_open_sessions` skips them.
+
+        :param guild_id: The guild of the members.
+        :type guild_id: int
+        :param member_ids: The members whose sessions end.
+        :type member_ids: Iterable[int]
+        :return: None
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for member_id in member_ids:
+            credited_until = self.voice_channel_join_times.pop((guild_id, member_id), None)
+            if credited_until and guild_id in self.active_guilds:
+                self.voice_store.record_span(guild_id, member_id, credited_until, now)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member) -> None:
+        self.update_eligible_member(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member) -> None:
+        self.eligible_members.get(member.guild.id, set()).discard(member.id)
+        self.end_voice_sessions(member.guild.id, [member.id])
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
+        if before.roles != after.roles and self.update_eligible_member(after):
+            self.invalidate_reports(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild) -> None:
+        self.message_index.start_observing(guild.id, datetime.datetime.now(datetime.timezone.utc))
+        self.rebuild_eligible_members(guild)
+
+    @commands.Cog.listener()
+    async def on_disconnect(self) -> None:
+        if self.disconnected_at is None:
+            self.disconnected_at = datetime.datetime.now(datetime.timezone.utc)
+
+    @commands.Cog.listener()
+    async def on_resumed(self) -> None:
+        # A resumed session replays every missed event, so the message index stays complete
+        self.disconnected_at = None
+
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        """
+        Handles a new gateway session. Messages sent while the bot was disconnected were not delivered, so the
+        live coverage of the message index is closed at the disconnect and reopened now. Voice sessions are
+        rebuilt from the current voice states for the same reason.
+
+        :return: None
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if self.disconnected_at is not None:
+            for guild_id in self.message_index.observed_guilds():
+                self.message_index.stop_observing(guild_id, self.disconnected_at)
+            self.disconnected_at = None
+        for guild in self.bot.guilds:
+            self.message_index.start_observing(guild.id, now)
+            # The member cache was refilled by the new session
+            self.rebuild_eligible_members(guild)
+        await self.reconcile_voice_sessions()
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: Any, before: Any, after: Any) -> None:
@@ -40,7 +355,8 @@ class Inactivity(commands.Cog):
         The method performs the following tasks:
         - Tracks voice channel join times for users who are not bots,
           and who are not excluded based on roles or explicitly included rules.
-        - Records the duration of time spent in a voice channel upon leaving.
+        - Counts the connection on join; the session time is credited periodically by
+          :meth:`credit_open_sessions` and the remainder upon leaving.
         - Skips tracking for users with excluded roles unless they are individually included.
         - Integrates with functions for storing voice activity data and updating connection counts.
 
@@ -52,122 +368,124 @@ class Inactivity(commands.Cog):
         :type after: Any
         :return: None
         """
-        if member.bot:
-            return
-
         guild_id = member.guild.id
-        excluded_roles = self.excluded_roles.get(guild_id, [])
-        included_users = self.included_users.get(guild_id, [])
 
-        # Check if member has any excluded roles and is not explicitly included
-        if any(role.id in excluded_roles for role in member.roles) and member.id not in included_users:
-            return  # Skip tracking for this member
+        # User leaves the voice channel. Handled before the eligibility check, so a session never outlives
+        # the voice connection even if the member stopped being tracked in the meantime
+        if before.channel is not None and after.channel is None:
+            # Time until the last periodic credit is already stored, only the remainder is left
+            credited_until = self.voice_channel_join_times.pop((guild_id, member.id), None)
+
+            if credited_until:
+                await self.store_voice_session(guild_id=guild_id, member=member, since=credited_until,
+                                               until=datetime.datetime.now(datetime.timezone.utc))
+            return
+
+        # Skip bots and members with excluded roles that are not explicitly included
+        if member.id not in self.eligible_members.get(guild_id, ()):
+            return
 
         # User joins a voice channel
         if before.channel is None and after.channel is not None:
             time: datetime = datetime.datetime.now(datetime.timezone.utc)
-            self.voice_channel_join_times[member.id] = time
+            self.voice_channel_join_times[(guild_id, member.id)] = time
+            # The connection is counted right away so a crash can't lose it
+            if guild_id in self.active_guilds:
+                self.voice_store.record(guild_id, member.id, connections=1, when=time)
 
-        # User leaves the voice channel
-        elif before.channel is not None and after.channel is None:
-            # Get the guild from the before state (since they just left)
-            join_time = self.voice_channel_join_times.pop(member.id, None)
-
-            if join_time:
-                duration = int((datetime.datetime.now(datetime.timezone.utc) - join_time).total_seconds())
-                await self.store_voice_times(guild_id=guild_id, member=member, time=duration)
-                await self.increment_voice_connections(guild_id=guild_id, member=member)  # Increment connection count
-
-    async def store_voice_times(self, guild_id: int, member: Any, time: Any) -> None:
+    async def store_voice_session(self, guild_id: int, member: Any, since: datetime.datetime,
+                                  until: datetime.datetime) -> None:
         """
-        Store voice activity time for a guild member in a JSON file.
+        Credits voice time of a guild member to the voice activity store.
 
-        This function tracks and saves the voice activity time of a specific
-        user within a given guild. The data is stored in a JSON file specific
-        to the guild and includes the user's voice usage statistics, recorded
-        per month.
+        Open sessions are credited in small increments by :meth:`credit_open_sessions`; this records one
+        increment, or the remainder when the member leaves. The time is recorded in the daily buckets of the
+        :class:`VoiceActivityStore`, split at midnight. Nothing is written to disk here; dirty guilds are
+        flushed by :meth:`flush_voice_activity` on an interval and when the cog is unloaded.
 
         :param guild_id: The unique identifier of the guild to which the member belongs.
         :type guild_id: int
         :param member: An object representing the guild member whose activity is being tracked.
         :type member: Any
-        :param time: The duration of voice activity to be stored, typically in seconds or minutes.
-        :type time: Any
+        :param since: The time the session was last credited (or the join time).
+        :type since: datetime.datetime
+        :param until: The end of the credited time.
+        :type until: datetime.datetime
         :return: This function does not return any value.
         :rtype: None
         """
         if guild_id in self.active_guilds:
-            # File path where the activity data is stored
-            file_path: str = f'activity/{guild_id}.json'
-
-            # Load existing data from the file if it exists, or initialize an empty dictionary
-            if os.path.exists(file_path):
-                with open(file_path, 'r') as f:
-                    voice_data = json.load(f)
-            else:
-                voice_data: dict = {}
-
-            user_id: str = str(member.id)  # Use the user ID as a string
-            date: str = datetime.datetime.now(datetime.timezone.utc).strftime(
-                "%Y-%m")  # Get the current year and month in YYYY-MM
-
-            # If the user doesn't have an entry in the JSON, initialize it
-            if user_id not in voice_data:
-                voice_data[user_id] = {}
+            self.voice_store.record_span(guild_id, member.id, since, until)
 
-            # If the user doesn't have an entry for the current month, initialize it
-            if date not in voice_data[user_id]:
-                voice_data[user_id][date] = {"voice_times": 0, "voicechannel_connections": 0}  # Initialize both fields
-
-            # Add the duration to the existing time
-            voice_data[user_id][date]["voice_times"] += time
+    def credit_open_sessions(self) -> None:
+        """
+        Credits the time of every open voice session since its last credit and records which sessions are open.
 
-            # Save the updated data back to the file
-            with open(file_path, 'w') as f:
-                json.dump(voice_data, f, indent=4)
+        Runs right before each flush, so at most one flush interval of voice time can be lost in a crash, and
+        long sessions show up in the totals while they are still running.
 
-    async def increment_voice_connections(self, guild_id: int, member: Any) -> None:
+        :return: None
         """
-        Increments the count of voice channel connections for a specific guild member. The function tracks the
-        voice channel activities of members in a guild and stores the data in a JSON file. If the guild is
-        active and the corresponding file for the guild exists, the function updates the connection count
-        for the specified member. Otherwise, it initializes necessary data structures and adds the member's
-        voice activity data for the current year and month.
-
-        :param guild_id: The unique identifier for the guild.
-        :type guild_id: int
-        :param member: An object representing a guild member. Assumed to have an 'id' attribute.
-        :type member: Any
-        :return: This function does not return any value.
-        :rtype: None
+        now = datetime.datetime.now(datetime.timezone.utc)
+        open_sessions: dict[int, set[int]] = {guild_id: set() for guild_id in self.active_guilds}
+        for (guild_id, member_id), credited_until in self.voice_channel_join_times.items():
+            if guild_id in self.active_guilds:
+                self.voice_store.record_span(guild_id, member_id, credited_until, now)
+                open_sessions[guild_id].add(member_id)
+            self.voice_channel_join_times[(guild_id, member_id)] = now
+        for guild_id, member_ids in open_sessions.items():
+            self.voice_store.set_open_sessions(guild_id, member_ids)
+
+    async def reconcile_voice_sessions(self) -> None:
         """
-        if guild_id in self.active_guilds:
-            file_path: str = f'activity/{guild_id}.json'
-
-            # Load existing data from the file if it exists, or initialize an empty dictionary
-            if os.path.exists(file_path):
-                with open(file_path, 'r') as f:
-                    voice_data = json.load(f)
-            else:
-                voice_data: dict = {}
+        Rebuilds the open voice sessions from the voice states of every guild.
 
-            user_id: str = str(member.id)
-            date: str = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m")  # Current year and month
+        Called on startup and for every new gateway session, since voice events that happened while the bot
+        was offline are never delivered. Members in a voice channel get a session starting now; only those
+        that had no open session at the last flush count as a new connection. Sessions of members that left
+        in the meantime are dropped, their time up to the last credit is already stored.
 
-            # Initialize user data if not present
-            if user_id not in voice_data:
-                voice_data[user_id] = {}
+        :return: None
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        sessions: dict[tuple[int, int], datetime.datetime] = {}
+        for guild in self.bot.guilds:
+            eligible_members = self.eligible_members.get(guild.id, set())
+            persisted = self.voice_store.open_sessions(guild.id) if guild.id in self.active_guilds else set()
+            for channel in [*guild.voice_channels, *guild.stage_channels]:
+                for member in channel.members:
+                    if member.id not in eligible_members:
+                        continue
+                    key = (guild.id, member.id)
+                    if key in self.voice_channel_join_times:
+                        sessions[key] = self.voice_channel_join_times[key]
+                        continue
+                    sessions[key] = now
+                    if guild.id in self.active_guilds and member.id not in persisted:
+                        self.voice_store.record(guild.id, member.id, connections=1, when=now)
+        self.voice_channel_join_times = sessions
+        logger.info(f"Reconciled {len(sessions)} open voice sessions")
 
-            # Initialize monthly data if not present
-            if date not in voice_data[user_id]:
-                voice_data[user_id][date] = {"voice_times": 0, "voicechannel_connections": 0}
+    async def flush_voice_activity(self) -> None:
+        """
+        Background task that periodically writes dirty guilds of the voice activity store, the
+        message index and the crawl watermarks to disk. Flushing the watermarks while a crawl is running is
+        what lets an interrupted inactivity check resume where it stopped.
 
-            # Increment the connection count
-            voice_data[user_id][date]["voicechannel_connections"] += 1
+        The interval is configured with the ``ACTIVITY_FLUSH_INTERVAL`` environment variable (seconds).
+        A final flush happens in :meth:`cog_unload`, so a clean shutdown never loses recorded activity.
 
-            # Save the updated data back to the file
-            with open(file_path, 'w') as f:
-                json.dump(voice_data, f, indent=4)
+        :return: None
+        """
+        while True:
+            await asyncio.sleep(ACTIVITY_FLUSH_INTERVAL)
+            try:
+                self.credit_open_sessions()
+                await self.voice_store.flush()
+                await self.message_index.flush()
+                await self.crawl_state.flush()
+            except Exception as e:
+                logger.error(f"Error while flushing voice activity: {e}")
 
     async def load_active_guilds(self):
         """
@@ -298,16 +616,165 @@ class Inactivity(commands.Cog):
             case _:
                 raise ValueError("Invalid operation. Please choose 'Enable' or 'Disable'.")
 
+    async def build_inactivity_report(
+            self,
+            guild: discord.Guild,
+            days: int,
+            full_crawl: bool = False,
+            progress: Callable[[int, int, int, int], Awaitable[None]] | None = None,
+    ) -> tuple[datetime.datetime, list]:
+        """
+        Computes the inactivity report of a guild and stores it in :attr:`inactivity_reports`.
+
+        Text activity is answered from the last-message index maintained by :meth:`on_message`; channel
+        histories are only crawled for the parts of the window the index has not observed (e.g. bot downtime),
+        and the crawled range is added to the index afterwards. Per-channel crawl watermarks make those crawls
+        incremental across runs and ``days`` values. Voice totals come from the daily voice buckets.
+
+        :param guild: The guild to compute the report for.
+        :type guild: discord.Guild
+        :param days: The number of days without a message after which a member counts as inactive.
+        :type days: int
+        :param full_crawl: If False, crawling stops as soon as every candidate member has been seen writing, and
+            channels none of the remaining candidates can view are skipped. If True, every message of the
+            uncovered ranges is read, which also lets the message index mark them as covered.
+        :type full_crawl: bool
+        :param progress: Coroutine called with the checked messages, completed channels, total channels and
+            API calls while crawling.
+        :type progress: Callable[[int, int, int, int], Awaitable[None]] | None
+        :raises discord.HTTPException: If the channel history could not be retrieved.
+        :return: The time the report was generated and the inactive members as
+            ``(member, hours, minutes, connections)`` tuples.
+        :rtype: tuple[datetime.datetime, list]
+        """
+        guild_id = guild.id
+        now = datetime.datetime.now(datetime.timezone.utc)
+        past_date = now - datetime.timedelta(days=days)
+        eligible_members = self.eligible_members.get(guild_id, set())
+
+        # Only the ranges of the window the message index has not observed itself need to be crawled
+        gaps = self.message_index.uncovered(guild_id, past_date, now)
+
+        # In the default mode only members the index can't already confirm as active are looked for
+        pending: dict[int, discord.Member] | None = None
+        if not full_crawl:
+            known_messages = self.message_index.last_messages(guild_id)
+            pending = {
+                member.id: member
+                for member in guild.members
+                if member.id in eligible_members
+                and not (member.id in known_messages and known_messages[member.id] >= past_date)
+            }
+
+        message_counter: int = 0
+        channel_counter: int = 0
+        total_channels: int = 0
+        api_call_counter: int = 0
+        try:
+            for gap_start, gap_end in gaps:
+                logger.info(f"Crawling history of {guild.name} from {gap_start} to {gap_end}")
+                base_messages, base_channels, base_total, base_calls = (
+                    message_counter, channel_counter, total_channels, api_call_counter)
+
+                async def report_crawl(crawler: HistoryCrawler) -> None:
+                    nonlocal message_counter, channel_counter, total_channels, api_call_counter
+                    message_counter = base_messages + crawler.message_count
+                    channel_counter = base_channels + crawler.completed
+                    total_channels = base_total + crawler.total
+                    api_call_counter = base_calls + crawler.api_calls
+                    if progress:
+                        await progress(message_counter, channel_counter, total_channels, api_call_counter)
+
+                crawler = HistoryCrawler(guild, after=gap_start, before=gap_end, progress=report_crawl,
+                                         pending=pending, state=self.crawl_state)
+                gap_results = await crawler.run()
+
+                self.message_index.merge(guild_id, gap_results)
+                if crawler.terminated_early:
+                    logger.info(f"Stopped crawling {guild.name} early, {crawler.skipped} channels skipped")
+                elif not crawler.failed:
+                    self.message_index.mark_covered(guild_id, gap_start, gap_end)
+        finally:
+            await self.crawl_state.flush()
+
+        last_message_list = self.message_index.last_messages(guild_id)
+
+        # Find users who haven't sent a message in the last {days} days and gather their voice times
+        inactive_users = []
+        for member in guild.members:
+            if member.id not in eligible_members:
+                continue
+
+            last_message_time: datetime.datetime = last_message_list.get(member.id)
+            if not last_message_time or last_message_time < past_date:
+                # Get the total voice time and connections for this user over the past {days}
+                total_voice_seconds, total_connections = self.voice_store.window_totals(
+                    guild_id, member.id, past_date, now)
+
+                # Convert total voice time to hours and minutes
+                hours, remainder = divmod(total_voice_seconds, 3600)
+                minutes = remainder // 60
+
+                inactive_users.append((member, hours, minutes, total_connections))
+
+        generated_at = datetime.datetime.now(datetime.timezone.utc)
+        self.inactivity_reports[(guild_id, days)] = (generated_at, inactive_users)
+        return generated_at, inactive_users
+
+    async def precompute_inactivity_reports(self) -> None:
+        """
+        Background task that refreshes the inactivity reports of every guild in :attr:`active_guilds` once a
+        day during off-peak hours, so ``/inactivity_check`` can answer immediately.
+
+        The window is configured with ``INACTIVITY_PRECOMPUTE_WINDOW`` as ``HH:MM-HH:MM`` in UTC. Guilds not
+        reached before the window closes are refreshed the next day. The longest report is computed first with
+        a full crawl, which leaves the message index covered so the shorter windows need no crawling at all.
+
+        :return: None
+        """
+        start_time, end_time = (datetime.time.fromisoformat(part.strip())
+                                for part in INACTIVITY_PRECOMPUTE_WINDOW.split("-"))
+        while True:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            window_start = datetime.datetime.combine(now.date(), start_time, tzinfo=datetime.timezone.utc)
+            if window_start <= now:
+                window_start += datetime.timedelta(days=1)
+            await asyncio.sleep((window_start - now).total_seconds())
+
+            window_end = datetime.datetime.combine(window_start.date(), end_time, tzinfo=datetime.timezone.utc)
+            if window_end <= window_start:
+                window_end += datetime.timedelta(days=1)
+            logger.info(f"Precomputing inactivity reports for {len(self.active_guilds)} guilds")
+            for guild_id in list(self.active_guilds):
+                if datetime.datetime.now(datetime.timezone.utc) >= window_end:
+                    logger.warning("Precompute window closed before every guild was refreshed")
+                    break
+                guild = self.bot.get_guild(guild_id)
+                if guild is None:
+                    continue
+                try:
+                    for days in sorted(INACTIVITY_REPORT_DAYS, reverse=True):
+                        await self.build_inactivity_report(guild, days, full_crawl=True)
+                    logger.info(f"Precomputed inactivity reports for {guild.name} ({guild_id})")
+                except Exception as e:
+                    logger.error(f"Failed to precompute inactivity reports for guild {guild_id}: {e}")
+
     @app_commands.command(name="inactivity_check", description="List inactive users. (tracking)")
     @app_commands.allowed_installs(guilds=True, users=False)
     @app_commands.guild_only()
     @app_commands.checks.has_permissions(manage_guild=True)
     @app_commands.choices(days=[
-        app_commands.Choice(name="30 days", value=30),
-        app_commands.Choice(name="60 days", value=60),
-        app_commands.Choice(name="90 days", value=90)
+        app_commands.Choice(name=f"{days} days", value=days) for days in INACTIVITY_REPORT_DAYS
+    ])
+    @app_commands.choices(export=[
+        app_commands.Choice(name="CSV", value="csv"),
+        app_commands.Choice(name="JSON", value="json")
     ])
-    async def inactivity_check(self, interaction: discord.Interaction, days: int = 30) -> None:
+    @app_commands.describe(full_crawl="Read every message instead of stopping once all members are confirmed active.",
+                           refresh="Recompute the report instead of using the precomputed one.",
+                           export="Attach the full report as a file.")
+    async def inactivity_check(self, interaction: discord.Interaction, days: int = 30,
+                               full_crawl: bool = False, refresh: bool = False, export: str | None = None) -> None:
         """
         Provides the `inactivity_check` command to identify and list inactive users in a Discord server.
 
@@ -317,9 +784,10 @@ class Inactivity(commands.Cog):
         engagement.
 
         This command also manages exclusions for specific roles and includes specific users explicitly.
-        It supports cached data for optimization, ensuring the command can execute efficiently for
-        frequently used configurations. Progress is shown dynamically during execution, providing real-time
-        updates as text channel histories and voice activity data are processed.
+        Reports are precomputed in the background by :meth:`precompute_inactivity_reports`; a stored report
+        younger than ``INACTIVITY_REPORT_MAX_AGE`` hours is returned immediately together with the time it
+        was generated. Otherwise, or when ``refresh`` or ``full_crawl`` is set, the report is computed with
+        :meth:`build_inactivity_report` and progress is shown dynamically during execution.
 
         Command requires the following features to execute:
         - Permission to manage the guild (accessible only to users with `Manage Server` permissions).
@@ -334,12 +802,22 @@ class Inactivity(commands.Cog):
             parameter determines the cutoff for considering message and voice activity data in the
             inactivity reports.
         :type days: int
+        :param full_crawl: If False (default), crawling stops as soon as every candidate member has been seen
+            writing, and channels none of the remaining candidates can view are skipped. If True, every
+            message of the uncovered ranges is read, which also lets the message index mark them as covered.
+            Implies ``refresh``.
+        :type full_crawl: bool
+        :param refresh: Forces a new report even if a precomputed one is available.
+        :type refresh: bool
+        :param export: ``"csv"`` or ``"json"`` to attach the full report as a file.
+        :type export: str | None
         :return: This command does not return any value or output but performs its functionality by
             interacting directly with the Discord server. It sends messages or embed objects as responses
             to the initiating user or admin group based on inactivity data.
         :rtype: None
         """
-        logger.info(f"Command: {interaction.command.name} used by {interaction.user.name}, days: {days}")
+        logger.info(f"Command: {interaction.command.name} used by {interaction.user.name}, days: {days}, "
+                    f"refresh: {refresh}")
         admin_log_cog = interaction.client.get_cog("AdminLog")
         if admin_log_cog:
             await admin_log_cog.log_interaction(
@@ -349,26 +827,22 @@ class Inactivity(commands.Cog):
             )
 
         guild = interaction.guild
-        guild_id = guild.id
-        excluded_roles = self.excluded_roles.get(guild_id, [])
-        included_users = self.included_users.get(guild_id, [])
-
-        channel_counter: int = 0
-        message_counter: int = 0
-        api_call_counter: int = 0
-        total_channels: int = len(interaction.guild.text_channels)
-        past_date = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
-        last_message_list: dict = {}
-        voice_times: dict = {}
 
         # Defer the interaction to prevent timeout
         await interaction.response.defer(thinking=True)  # noqa
-        api_call_counter += 1
 
-        async def update_progress() -> None:
-            nonlocal api_call_counter
+        report = self.inactivity_reports.get((guild.id, days))
+        now = datetime.datetime.now(datetime.timezone.utc)
+        # A full crawl is only useful if it actually runs, so it never returns a stored report
+        if report and not refresh and not full_crawl and (now - report[0]).total_seconds() < INACTIVITY_REPORT_MAX_AGE * 3600:
+            generated_at, inactive_users = report
+            await self.send_inactivity_report(interaction, days, generated_at, inactive_users, precomputed=True,
+                                              export=export)
+            return
+
+        async def update_progress(message_counter: int, channel_counter: int, total_channels: int,
+                                  api_call_counter: int) -> None:
             try:
-                api_call_counter += 1
                 await interaction.edit_original_response(
                     content=(
                         f"Checked {message_counter} messages & "
@@ -379,184 +853,89 @@ class Inactivity(commands.Cog):
             except discord.HTTPException as e:
                 logger.warning(f"Failed to update progress: {e}")
 
-        await update_progress()
-
-        cache_key = (guild_id, days)
-        now = datetime.datetime.now(datetime.timezone.utc)
-        cached_entry = self.inactivity_cache.get(cache_key)
-        if cached_entry and (now - cached_entry[0]).total_seconds() < 600:
-            api_call_counter += 1
-            await interaction.edit_original_response(content="Using cached inactivity data")
-            inactive_users = cached_entry[1]
-            mention_member_list: str = "\n".join([
-                f"<@{member.id}>   ⏱️ {hours}h {minutes}m   🔗 {connections}"
-                if hours > 0 or minutes > 0 or connections > 0
-                else f"<@{member.id}>"
-                for member, hours, minutes, connections in inactive_users
-            ])
-            included_roles_str: str = ", ".join([f"<@&{role.id}>" for role in guild.roles if role.id in excluded_roles])
-            included_users_str: str = ", ".join([f"<@{user}>" for user in included_users])
-            if inactive_users:
-                embed = discord.Embed(
-                    title=f"Inactive Users Report (Last {days} Days)",
-                    description=f"""
-                    **Excluded Roles:** {included_roles_str}
-                    **Tracked Users:** {included_users_str}
-
-                    This report lists users who haven't sent a message in the last {days} days.
-
-                    ⏱️ = Total time spent in voice channels
-                    🔗 = Total number of joined voice channels\n
-                    """,
-                    color=discord.Color.blue(),
-                )
-                embed.add_field(name="Inactive Users", value=mention_member_list, inline=False)
-                embed.set_footer(text=f"Generated by {interaction.user.name} (cached)")
-                await interaction.followup.send(embed=embed)
-            else:
-                await interaction.followup.send(content=f"No inactive users found in the last {days} days.")
-            return
-
-        # Load voice activity data from the JSON file for the guild
-        voice_data_file: str = f"activity/{guild_id}.json"
-
-        if os.path.isfile(voice_data_file):
-            with open(voice_data_file, "r") as f:
-                voice_times = json.load(f)
-
-        async def process_history(target: discord.abc.Messageable) -> None:
-            nonlocal message_counter, api_call_counter
-            try:
-                api_call_counter += 1
-                async for message in target.history(limit=None, after=past_date):
-                    author = message.author
-                    if not isinstance(author, discord.Member):
-                        continue
-                    if author.bot:
-                        continue
-                    if (any(role.id in excluded_roles for role in author.roles) and
-                            author.id not in included_users):
-                        continue
-
-                    message_counter += 1
-                    if (author.id not in last_message_list or
-                            message.created_at > last_message_list[author.id]):
-                        last_message_list[author.id] = message.created_at
-            except discord.HTTPException as e:
-                logger.warning(
-                    f"Failed to fetch history for {getattr(target, 'name', 'unknown')}: {e}")
-
         try:
-            for channel in guild.text_channels:  # Iterate only over text channels
-                if not channel.permissions_for(guild.me).read_message_history:
-                    logger.warning(f"Bot lacks 'Read Message History' in {channel.name}")
-                else:
-                    await process_history(channel)
-                channel_counter += 1
-                await update_progress()
-
-                for thread in channel.threads:
-                    last_message_time = (
-                        discord.utils.snowflake_time(thread.last_message_id)
-                        if thread.last_message_id
-                        else None
-                    )
-                    if last_message_time and last_message_time >= past_date:
-                        total_channels += 1
-                        await process_history(thread)
-                        channel_counter += 1
-                        await update_progress()
-
-                api_call_counter += 1
-                async for thread in channel.archived_threads(limit=None):
-                    last_message_time = (
-                        discord.utils.snowflake_time(thread.last_message_id)
-                        if thread.last_message_id
-                        else None
-                    )
-                    if last_message_time and last_message_time < past_date:
-                        break
-                    total_channels += 1
-                    await process_history(thread)
-                    channel_counter += 1
-                    await update_progress()
-
+            generated_at, inactive_users = await self.build_inactivity_report(
+                guild, days, full_crawl=full_crawl, progress=update_progress)
         except Exception as e:
             logger.error(f"Failed to retrieve channel history during inactivity_check: {e}")
             await interaction.followup.send(content="Failed to retrieve channel history.")
             return
 
-        # Find users who haven't sent a message in the last {days} days and gather their voice times
-        inactive_users = []
-        for member in guild.members:
-            if member.bot:
-                continue
-            if (any(role.id in excluded_roles for role in member.roles) and
-                    member.id not in included_users):
-                continue
-
-            last_message_time: datetime.datetime = last_message_list.get(member.id)
-            if not last_message_time or last_message_time < past_date:
-                # Get the total voice time and connections for this user over the past {days}
-                total_voice_seconds: int = 0
-                total_connections: int = 0
-                user_id = str(member.id)
+        await self.send_inactivity_report(interaction, days, generated_at, inactive_users, export=export)
 
-                if user_id in voice_times:
-                    # Loop through the months that are relevant for the specified days
-                    for year_month, voice_data in voice_times[user_id].items():
-                        year, month = map(int, year_month.split("-"))
-
-                        # Make activity_date timezone-aware by attaching the UTC timezone
-                        activity_date: datetime.datetime = datetime.datetime(year, month, 1,
-                                                                             tzinfo=datetime.timezone.utc)
+    async def send_inactivity_report(self, interaction: discord.Interaction, days: int,
+                                     generated_at: datetime.datetime, inactive_users: list,
+                                     precomputed: bool = False, export: str | None = None) -> None:
+        """
+        Sends an inactivity report as a follow-up of the interaction. The embed timestamp shows when the
+        report was generated.
 
-                        # Check if the activity date falls within the last {days}
-                        if activity_date >= past_date.replace(day=1):
-                            total_voice_seconds += voice_data.get("voice_times", 0)
-                            total_connections += voice_data.get("voicechannel_connections", 0)
+        The member list is split into pages that each fit into one embed field, with buttons to navigate
+        between them. Optionally the full report is attached as a CSV or JSON file.
 
-                # Convert total voice time to hours and minutes
-                hours, remainder = divmod(total_voice_seconds, 3600)
-                minutes = remainder // 60
+        :param interaction: The interaction of the ``inactivity_check`` command.
+        :type interaction: discord.Interaction
+        :param days: The number of days the report covers.
+        :type days: int
+        :param generated_at: The time the report was generated.
+        :type generated_at: datetime.datetime
+        :param inactive_users: The inactive members as ``(member, hours, minutes, connections)`` tuples.
+        :type inactive_users: list
+        :param precomputed: Whether the report comes from the precomputed reports.
+        :type precomputed: bool
+        :param export: ``"csv"`` or ``"json"`` to attach the report as a file, or None.
+        :type export: str | None
+        :return: None
+        """
+        guild = interaction.guild
+        excluded_roles = self.excluded_roles.get(guild.id, [])
+        included_users = self.included_users.get(guild.id, [])
 
-                inactive_users.append((member, hours, minutes, total_connections))
+        if not inactive_users:
+            await interaction.followup.send(
+                content=f"No inactive users found in the last {days} days "
+                        f"(data from <t:{int(generated_at.timestamp())}:R>).")
+            return
 
-        self.inactivity_cache[cache_key] = (
-            datetime.datetime.now(datetime.timezone.utc),
-            inactive_users,
+        included_roles_str: str = ", ".join(
+            [f"<@&{role.id}>" for role in guild.roles if role.id in excluded_roles]
         )
+        included_users_str: str = ", ".join([f"<@{user}>" for user in included_users])
 
-        if inactive_users:
-            mention_member_list: str = "\n".join([
-                f"<@{member.id}>   ⏱️ {hours}h {minutes}m   🔗 {connections}"
-                if hours > 0 or minutes > 0 or connections > 0
-                else f"<@{member.id}>"
-                for member, hours, minutes, connections in inactive_users
-            ])
-            included_roles_str: str = ", ".join(
-                [f"<@&{role.id}>" for role in guild.roles if role.id in excluded_roles]
-            )
-            included_users_str: str = ", ".join([f"<@{user}>" for user in included_users])
+        def build_embed(page_text: str, page: int, page_count: int) -> discord.Embed:
             embed = discord.Embed(
                 title=f"Inactive Users Report (Last {days} Days)",
                 description=f"""
                 **Excluded Roles:** {included_roles_str}
                 **Tracked Users:** {included_users_str}
 
-                This report lists users who haven't sent a message in the last {days} days.
+                This report lists {len(inactive_users)} users who haven't sent a message in the last {days} days.
+                Data from <t:{int(generated_at.timestamp())}:R>.
 
                 ⏱️ = Total time spent in voice channels
                 🔗 = Total number of joined voice channels\n
                 """,
                 color=discord.Color.blue(),
+                timestamp=generated_at,
             )
-
-            embed.add_field(name="Inactive Users", value=mention_member_list, inline=False)
-            embed.set_footer(text=f"Generated by {interaction.user.name}")
-            await interaction.followup.send(embed=embed)
+            embed.add_field(name=f"Inactive Users ({page}/{page_count})", value=page_text, inline=False)
+            if precomputed:
+                embed.set_footer(text=f"Requested by {interaction.user.name} (precomputed, use refresh to update)")
+            else:
+                embed.set_footer(text=f"Generated by {interaction.user.name}")
+            return embed
+
+        pages = list(iter_report_pages(iter_report_rows(inactive_users)))
+        kwargs: dict[str, Any] = {}
+        if export:
+            kwargs["file"] = export_report(iter_report_rows(inactive_users), export,
+                                           f"inactivity_{guild.id}_{days}d")
+        if len(pages) > 1:
+            view = InactivityReportView(interaction, build_embed, pages)
+            view.message = await interaction.followup.send(embed=view.current_embed(), view=view, wait=True,
+                                                           **kwargs)
         else:
-            await interaction.followup.send(content=f"No inactive users found in the last {days} days.")
+            await interaction.followup.send(embed=build_embed(pages[0], 1, 1), **kwargs)
 
     @app_commands.command(name="tracking_roles",
                           description="Mange which roles should be excluded from the activity tracking.")
@@ -615,6 +994,7 @@ class Inactivity(commands.Cog):
                 self.excluded_roles[guild_id] = excluded_roles
                 # Save to guild config
                 await self.update_guild_config_excluded_roles(guild_id, excluded_roles)
+                self.rebuild_eligible_members(interaction.guild)
                 await interaction.response.send_message(f"Role {role.name} added to the exclusion list.")  # noqa
             else:
                 await interaction.response.send_message(f"Role {role.name} is already in the exclusion list.")  # noqa
@@ -630,6 +1010,7 @@ class Inactivity(commands.Cog):
                 self.excluded_roles[guild_id] = excluded_roles
                 # Save to guild config
                 await self.update_guild_config_excluded_roles(guild_id, excluded_roles)
+                self.rebuild_eligible_members(interaction.guild)
                 await interaction.response.send_message(f"Role {role.name} removed from the exclusion list.")  # noqa
             else:
                 await interaction.response.send_message(f"Role {role.name} is not in the exclusion list.")  # noqa
@@ -700,6 +1081,7 @@ class Inactivity(commands.Cog):
                 self.included_users[guild_id] = included_users
                 # Save to guild config
                 await self.update_guild_config_included_users(guild_id, included_users)
+                self.rebuild_eligible_members(interaction.guild)
                 await interaction.response.send_message(f"User {user.mention} added to the inclusion list.")  # noqa
             else:
                 await interaction.response.send_message(
@@ -716,6 +1098,7 @@ class Inactivity(commands.Cog):
                 self.included_users[guild_id] = included_users
                 # Save to guild config
                 await self.update_guild_config_included_users(guild_id, included_users)
+                self.rebuild_eligible_members(interaction.guild)
                 await interaction.response.send_message(f"User {user.mention} removed from the inclusion list.")  # noqa
             else:
                 await interaction.response.send_message(f"User {user.mention} is not in the inclusion list.")  # noqa
@@ -1,31 +1,60 @@
 import asyncio
+import hashlib
 import io
+import json
+import mimetypes
 import os
+import re
 import tempfile
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Optional
-from urllib.parse import urlparse
+from typing import Any, Awaitable, Callable, Optional
 
+import aiohttp
 import asyncpg
-import boto3
 import discord
 from discord import app_commands
 from discord.ext import commands
-from PIL import Image, ImageSequence
 
 from bot import bot as shadow_bot
+from dependencies.encoding_profiles import THUMBNAIL_PROFILE, EncodingProfile, select_profile
+from dependencies.lru_cache import LRUCache
+from dependencies.media_gallery_api import API_ENABLED, GalleryApiServer, create_gallery_api
+from dependencies.media_storage import MediaData, MediaStorage, create_storage
+from dependencies.media_worker import MediaQueueFull, MediaWorkerService, transcode_image
 from logger import LoggerManager
 
 UPVOTE_EMOJI_NAME = os.getenv("IMAGE_UPVOTE_EMOJI_NAME", "arrow_upvote")
 UPVOTE_THRESHOLD = int(os.getenv("IMAGE_UPVOTE_THRESHOLD", "4"))
-S3_ENDPOINT = os.getenv("IMAGE_UPVOTE_S3_ENDPOINT")
-S3_BUCKET = os.getenv("IMAGE_UPVOTE_S3_BUCKET")
-S3_ACCESS_KEY = os.getenv("IMAGE_UPVOTE_S3_ACCESS_KEY")
-S3_SECRET_KEY = os.getenv("IMAGE_UPVOTE_S3_SECRET_KEY")
-S3_REGION = os.getenv("IMAGE_UPVOTE_S3_REGION")
 DATABASE_TABLE = "media_uploads"
+JOBS_TABLE = "media_upload_jobs"
+# Number of workers draining the upload job queue
+UPLOAD_WORKERS = int(os.getenv("IMAGE_UPVOTE_UPLOAD_WORKERS", "2"))
+# Attempts per upload job before it is given up
+UPLOAD_MAX_ATTEMPTS = int(os.getenv("IMAGE_UPVOTE_UPLOAD_MAX_ATTEMPTS", "5"))
+# Seconds before the first retry; doubles with every further attempt
+UPLOAD_RETRY_DELAY = int(os.getenv("IMAGE_UPVOTE_UPLOAD_RETRY_DELAY", "30"))
+# Seconds an idle worker waits before polling the queue again
+UPLOAD_POLL_INTERVAL = float(os.getenv("IMAGE_UPVOTE_UPLOAD_POLL_INTERVAL", "10"))
+# Days finished and failed jobs are kept
+UPLOAD_JOB_RETENTION_DAYS = int(os.getenv("IMAGE_UPVOTE_UPLOAD_JOB_RETENTION_DAYS", "30"))
+# Bytes read from the attachment stream per chunk while downloading
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("IMAGE_UPVOTE_DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+# Images and streamable audio up to this many bytes are processed in memory instead of through temp files
+IN_MEMORY_LIMIT = int(os.getenv("IMAGE_UPVOTE_IN_MEMORY_LIMIT", str(8 * 1024 * 1024)))
+# Audio containers ffmpeg can read from a pipe; mp4-based ones may keep their index at the end of the file
+PIPEABLE_AUDIO_EXTENSIONS = {".mp3", ".wav", ".ogg", ".flac"}
+# Number of attachments downloaded, converted and uploaded at the same time across all messages
+PIPELINE_CONCURRENCY = int(os.getenv("IMAGE_UPVOTE_PIPELINE_CONCURRENCY", "4"))
+# Number of messages whose upvotes are counted in memory
+UPVOTE_COUNTER_SIZE = int(os.getenv("IMAGE_UPVOTE_COUNTER_SIZE", "10000"))
+# Maximum number of entries a single /delete-upload removes
+DELETE_LIMIT = int(os.getenv("IMAGE_UPVOTE_DELETE_LIMIT", "5000"))
+# Number of message IDs kept in the in-memory uploaded-message index
+UPLOADED_INDEX_SIZE = int(os.getenv("IMAGE_UPVOTE_UPLOADED_INDEX_SIZE", "50000"))
+# Discord's limit for the value of an embed field, which admin log statuses are sent as
+EMBED_FIELD_LIMIT = 1024
 
 logger = LoggerManager(name="ImageUpvote", level="INFO", log_file="logs/ImageUpvote.log").get_logger()
 
@@ -33,17 +62,55 @@ logger = LoggerManager(name="ImageUpvote", level="INFO", log_file="logs/ImageUpv
 class ImageUpvote(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self._uploaded_messages: set[int] = set()
+        # Whether a message has been uploaded, in front of media_uploads.source_message_id
+        self._uploaded_messages: LRUCache[int, bool] = LRUCache(UPLOADED_INDEX_SIZE)
         self._db_pool: Optional[asyncpg.Pool] = None
-        self._s3_client = None
-        self._s3_bucket: Optional[str] = None
-        self._s3_url_prefix: Optional[str] = None
+        self._storage: Optional[MediaStorage] = None
+        self._api_server: Optional[GalleryApiServer] = None
+        self._media_worker = MediaWorkerService()
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._pipeline_semaphore = asyncio.Semaphore(max(1, PIPELINE_CONCURRENCY))
+        self._job_available = asyncio.Event()
+        # Upvotes per message, counted from the gateway events instead of fetching the message every time
+        self._upvote_counts: LRUCache[int, int] = LRUCache(UPVOTE_COUNTER_SIZE, on_evict=self._on_counter_evicted)
+        self._counts_valid_since = datetime.now(timezone.utc)
+        # Messages that reached the threshold but can't be uploaded (no media or already uploaded)
+        self._ignored_messages: LRUCache[int, bool] = LRUCache(UPVOTE_COUNTER_SIZE)
+        # Messages with an unfinished upload job, so further upvotes don't fetch and queue them again
+        self._queued_messages: LRUCache[int, bool] = LRUCache(UPVOTE_COUNTER_SIZE)
+        self._upload_workers: list[asyncio.Task] = []
 
     async def cog_load(self) -> None:
         await self._initialise_database()
-        self._initialise_s3()
+        await self._preload_uploaded_messages()
+        self._storage = create_storage()
+        self._media_worker.start()
+        self._http_session = aiohttp.ClientSession()
+        if self._db_pool is not None:
+            self._upload_workers = [
+                self.bot.loop.create_task(self._upload_worker(worker_id))
+                for worker_id in range(1, max(1, UPLOAD_WORKERS) + 1)
+            ]
+            if API_ENABLED:
+                self._api_server = GalleryApiServer(create_gallery_api(lambda: self._db_pool, DATABASE_TABLE))
+                self._api_server.start()
 
     async def cog_unload(self) -> None:
+        # Jobs interrupted here stay 'running' and are picked up again on the next start
+        for worker in self._upload_workers:
+            worker.cancel()
+        await asyncio.gather(*self._upload_workers, return_exceptions=True)
+        self._upload_workers = []
+        if self._api_server is not None:
+            await self._api_server.stop()
+            self._api_server = None
+        await self._media_worker.shutdown()
+        if self._storage is not None:
+            await self._storage.close()
+            self._storage = None
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
         if self._db_pool is not None:
             await self._db_pool.close()
             self._db_pool = None
@@ -81,34 +148,159 @@ class ImageUpvote(commands.Cog):
                     )
                     """
                 )
+                await connection.execute(
+                    f"ALTER TABLE {DATABASE_TABLE} ADD COLUMN IF NOT EXISTS source_message_id BIGINT"
+                )
+                await connection.execute(
+                    f"""
+                    CREATE INDEX IF NOT EXISTS {DATABASE_TABLE}_source_message_idx
+                    ON {DATABASE_TABLE} (source_message_id)
+                    """
+                )
+                await connection.execute(
+                    f"ALTER TABLE {DATABASE_TABLE} ADD COLUMN IF NOT EXISTS content_hash TEXT"
+                )
+                await connection.execute(
+                    f"""
+                    CREATE UNIQUE INDEX IF NOT EXISTS {DATABASE_TABLE}_content_hash_idx
+                    ON {DATABASE_TABLE} (content_hash) WHERE content_hash IS NOT NULL
+                    """
+                )
+                # Duplicates reuse the stored files of the original, so deletes check who else uses them
+                await connection.execute(
+                    f"""
+                    CREATE INDEX IF NOT EXISTS {DATABASE_TABLE}_file_path_idx
+                    ON {DATABASE_TABLE} (file_path)
+                    """
+                )
+                # Keyset pagination of the gallery API, newest first, optionally per creator or format
+                await connection.execute(
+                    f"""
+                    CREATE INDEX IF NOT EXISTS {DATABASE_TABLE}_date_idx
+                    ON {DATABASE_TABLE} (date_of_upload DESC, file_id DESC)
+                    """
+                )
+                await connection.execute(
+                    f"""
+                    CREATE INDEX IF NOT EXISTS {DATABASE_TABLE}_creator_date_idx
+                    ON {DATABASE_TABLE} (creator_name, date_of_upload DESC, file_id DESC)
+                    """
+                )
+                await connection.execute(
+                    f"""
+                    CREATE INDEX IF NOT EXISTS {DATABASE_TABLE}_format_date_idx
+                    ON {DATABASE_TABLE} (file_format, date_of_upload DESC, file_id DESC)
+                    """
+                )
+                # Older rows only carry the message ID in their "<author>-<message>_<index>" file name
+                await connection.execute(
+                    f"""
+                    UPDATE {DATABASE_TABLE}
+                    SET source_message_id = substring(filename FROM '^[0-9]+-([0-9]+)_')::BIGINT
+                    WHERE source_message_id IS NULL AND filename ~ '^[0-9]+-[0-9]+_'
+                    """
+                )
+                await connection.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {JOBS_TABLE} (
+                        job_id BIGSERIAL PRIMARY KEY,
+                        guild_id BIGINT NOT NULL,
+                        channel_id BIGINT NOT NULL,
+                        message_id BIGINT NOT NULL,
+                        source TEXT NOT NULL,
+                        requested_by BIGINT,
+                        status TEXT NOT NULL DEFAULT 'pending',
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        run_after TIMESTAMPTZ NOT NULL DEFAULT now(),
+                        last_error TEXT,
+                        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    )
+                    """
+                )
+                await connection.execute(
+                    f"""
+                    CREATE INDEX IF NOT EXISTS {JOBS_TABLE}_pending_idx
+                    ON {JOBS_TABLE} (run_after, job_id) WHERE status = 'pending'
+                    """
+                )
+                # A message can only be queued once until its job has finished
+                await connection.execute(
+                    f"""
+                    CREATE UNIQUE INDEX IF NOT EXISTS {JOBS_TABLE}_active_message_idx
+                    ON {JOBS_TABLE} (message_id) WHERE status IN ('pending', 'running')
+                    """
+                )
+                # Jobs still running belong to a previous process that was stopped mid-upload
+                recovered = await connection.execute(
+                    f"""
+                    UPDATE {JOBS_TABLE}
+                    SET status='pending', run_after=now(), updated_at=now()
+                    WHERE status='running'
+                    """
+                )
+                if recovered != "UPDATE 0":
+                    logger.info(f"Recovered interrupted upload jobs: {recovered}")
+                await connection.execute(
+                    f"""
+                    DELETE FROM {JOBS_TABLE}
+                    WHERE status IN ('done', 'failed') AND updated_at < now() - make_interval(days => $1)
+                    """,
+                    UPLOAD_JOB_RETENTION_DAYS,
+                )
             logger.info("Postgres connection initialised and table ensured for image upvotes.")
         except Exception:
             logger.exception("Failed to initialise Postgres connection")
             self._db_pool = None
 
-    def _initialise_s3(self) -> None:
-        if not all([S3_ENDPOINT, S3_BUCKET, S3_ACCESS_KEY, S3_SECRET_KEY]):
-            logger.error("S3 configuration is incomplete; uploads will be skipped.")
+    async def _preload_uploaded_messages(self) -> None:
+        if self._db_pool is None:
             return
         try:
-            session = boto3.session.Session()
-            self._s3_client = session.client(
-                "s3",
-                endpoint_url=S3_ENDPOINT,
-                aws_access_key_id=S3_ACCESS_KEY,
-                aws_secret_access_key=S3_SECRET_KEY,
-                region_name=S3_REGION,
-            )
-            self._s3_bucket = S3_BUCKET
-            endpoint = S3_ENDPOINT.rstrip("/")
-            bucket = S3_BUCKET.strip("/")
-            self._s3_url_prefix = f"{endpoint}/{bucket}"
-            logger.info("S3 client initialised for image upvotes.")
+            async with self._db_pool.acquire() as connection:
+                rows = await connection.fetch(
+                    f"""
+                    SELECT DISTINCT source_message_id
+                    FROM {DATABASE_TABLE}
+                    WHERE source_message_id IS NOT NULL
+                    ORDER BY source_message_id DESC
+                    LIMIT $1
+                    """,
+                    UPLOADED_INDEX_SIZE,
+                )
         except Exception:
-            logger.exception("Failed to initialise S3 client")
-            self._s3_client = None
-            self._s3_bucket = None
-            self._s3_url_prefix = None
+            logger.exception("Failed to preload uploaded message IDs")
+            return
+        # Oldest first, so the newest messages are the last to be evicted
+        for row in reversed(rows):
+            self._uploaded_messages[row["source_message_id"]] = True
+        logger.info(f"Preloaded {len(rows)} uploaded message IDs.")
+
+    async def _is_uploaded(self, message_id: int) -> bool:
+        """
+        Checks whether a message has already been uploaded, using the in-memory index before the database.
+
+        :param message_id: The ID of the source message.
+        :type message_id: int
+        :return: Whether media from the message is in ``media_uploads``.
+        :rtype: bool
+        """
+        cached = self._uploaded_messages.get(message_id)
+        if cached is not None:
+            return cached
+        if self._db_pool is None:
+            return False
+        try:
+            async with self._db_pool.acquire() as connection:
+                uploaded = await connection.fetchval(
+                    f"SELECT EXISTS (SELECT 1 FROM {DATABASE_TABLE} WHERE source_message_id=$1)",
+                    message_id,
+                )
+        except Exception:
+            logger.exception("Failed to look up uploads of message %s", message_id)
+            return False
+        self._uploaded_messages[message_id] = bool(uploaded)
+        return bool(uploaded)
 
     @staticmethod
     def _is_supported_attachment(attachment: discord.Attachment) -> bool:
@@ -127,15 +319,23 @@ class ImageUpvote(commands.Cog):
             file_format: str,
             creator_name: str,
             uploaded_by: str,
-    ) -> None:
+            source_message_id: Optional[int] = None,
+            content_hash: Optional[str] = None,
+    ) -> bool:
+        """
+        Inserts the metadata of an upload. Failures are logged, as the file itself is already stored.
+
+        :return: False if another upload with the same ``content_hash`` was recorded first, True otherwise.
+        :rtype: bool
+        """
         if not self._db_pool:
             logger.warning("Skipping database write for %s because pool is not initialised.", filename)
-            return
+            return True
         file_id = uuid.uuid4()
         date_of_upload = datetime.now(timezone.utc)
         try:
             async with self._db_pool.acquire() as connection:
-                await connection.execute(
+                inserted = await connection.fetchval(
                     f"""
                     INSERT INTO {DATABASE_TABLE} (
                         file_id,
@@ -145,9 +345,13 @@ class ImageUpvote(commands.Cog):
                         date_of_upload,
                         file_format,
                         creator_name,
-                        uploaded_by
+                        uploaded_by,
+                        source_message_id,
+                        content_hash
                     )
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                    ON CONFLICT (content_hash) WHERE content_hash IS NOT NULL DO NOTHING
+                    RETURNING file_id
                     """,
                     file_id,
                     filename,
@@ -157,165 +361,245 @@ class ImageUpvote(commands.Cog):
                     file_format,
                     creator_name,
                     uploaded_by,
+                    source_message_id,
+                    content_hash,
                 )
         except Exception:
             logger.exception("Failed to record upload metadata for %s", filename)
+            return True
+        return inserted is not None
 
     @staticmethod
     def _build_file_stem(message: discord.Message, index: int) -> str:
         return f"{message.author.id}-{message.id}_{index:02d}"
 
-    async def _upload_to_s3(self, local_path: Path, object_key: str, content_type: str) -> str:
-        if not self._s3_client or not self._s3_bucket or not self._s3_url_prefix:
-            raise RuntimeError("S3 client not configured")
-
-        def _upload() -> None:
-            extra_args = {"ContentType": content_type} if content_type else None
-            if extra_args:
-                self._s3_client.upload_file(
-                    str(local_path),
-                    self._s3_bucket,
-                    object_key,
-                    ExtraArgs=extra_args,
-                )
-            else:
-                self._s3_client.upload_file(
-                    str(local_path),
-                    self._s3_bucket,
-                    object_key,
-                )
-
-        await asyncio.to_thread(_upload)
-        return f"{self._s3_url_prefix}/{object_key}"
-
     @staticmethod
     def _content_type_for_extension(extension: str) -> str:
         mapping = {
             ".webp": "image/webp",
+            ".avif": "image/avif",
             ".gif": "image/gif",
             ".mp4": "video/mp4",
             ".mp3": "audio/mpeg",
         }
         return mapping.get(extension.lower(), "application/octet-stream")
 
-    def _extract_key_from_url(self, url: Optional[str]) -> Optional[str]:
-        if not url:
+    async def _download_attachment(self, attachment: discord.Attachment,
+                                   in_memory: bool = False) -> tuple[MediaData, str]:
+        """
+        Streams an attachment into a temporary file in chunks, so memory use does not depend on the file size.
+        Small attachments can be kept in memory instead. The content is hashed on the way.
+
+        :param attachment: The attachment to download.
+        :type attachment: discord.Attachment
+        :param in_memory: Whether to return the bytes instead of writing a temporary file.
+        :type in_memory: bool
+        :return: The downloaded file or bytes and the SHA-256 hex digest of the content. The caller is
+            responsible for deleting the file.
+        :rtype: tuple[MediaData, str]
+        """
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession()
+        source_path: Optional[Path] = None
+        if in_memory:
+            file = io.BytesIO()
+        else:
+            fd, temp_path = tempfile.mkstemp(suffix=Path(attachment.filename).suffix.lower() or ".tmp")
+            source_path = Path(temp_path)
+            file = os.fdopen(fd, "wb")
+        digest = hashlib.sha256()
+        try:
+            with file:
+                async with self._http_session.get(attachment.url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                        digest.update(chunk)
+                        file.write(chunk)
+                if in_memory:
+                    return file.getvalue(), digest.hexdigest()
+        except Exception as exc:
+            if source_path:
+                source_path.unlink(missing_ok=True)
+            raise RuntimeError(f"Failed to download attachment: {exc}") from exc
+        return source_path, digest.hexdigest()
+
+    async def _find_upload_by_hash(self, content_hash: str) -> Optional[asyncpg.Record]:
+        if not self._db_pool:
             return None
-        if self._s3_url_prefix:
-            prefix = self._s3_url_prefix.rstrip("/") + "/"
-            if url.startswith(prefix):
-                return url[len(prefix):]
-        parsed = urlparse(url)
-        path = parsed.path.lstrip("/")
-        if not path:
+        try:
+            async with self._db_pool.acquire() as connection:
+                return await connection.fetchrow(
+                    f"""
+                    SELECT file_id, filename, file_path, thumbnail_path, file_format
+                    FROM {DATABASE_TABLE}
+                    WHERE content_hash=$1
+                    """,
+                    content_hash,
+                )
+        except Exception:
+            logger.exception("Failed to look up uploads with hash %s", content_hash)
             return None
-        if self._s3_bucket:
-            bucket = self._s3_bucket.strip("/")
-            if path.startswith(f"{bucket}/"):
-                path = path[len(bucket) + 1:]
-        return path or None
 
-    async def _delete_s3_object(self, object_key: str) -> None:
-        if not self._s3_client or not self._s3_bucket:
-            raise RuntimeError("S3 client not configured")
+    async def _record_duplicate(
+            self,
+            message: discord.Message,
+            uploader_name: str,
+            existing: asyncpg.Record,
+            source: MediaData,
+    ) -> dict[str, Any]:
+        """
+        Links a message to an earlier upload of the same content. The row reuses the stored files of
+        ``existing`` and has no content hash, so the hash keeps pointing at a single entry. A message that is
+        already linked to those files is not recorded again.
+
+        :return: The result of the attachment, like for an upload.
+        :rtype: dict[str, Any]
+        """
+        if self._db_pool:
+            try:
+                async with self._db_pool.acquire() as connection:
+                    await connection.execute(
+                        f"""
+                        INSERT INTO {DATABASE_TABLE} (
+                            file_id,
+                            filename,
+                            file_path,
+                            thumbnail_path,
+                            date_of_upload,
+                            file_format,
+                            creator_name,
+                            uploaded_by,
+                            source_message_id
+                        )
+                        SELECT $1::uuid, $2::text, $3::text, $4::text, $5::timestamptz, $6::text, $7::text,
+                               $8::text, $9::bigint
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM {DATABASE_TABLE} WHERE source_message_id=$9 AND file_path=$3
+                        )
+                        """,
+                        uuid.uuid4(),
+                        existing["filename"],
+                        existing["file_path"],
+                        existing["thumbnail_path"],
+                        datetime.now(timezone.utc),
+                        existing["file_format"],
+                        message.author.display_name,
+                        uploader_name,
+                        message.id,
+                    )
+            except Exception:
+                logger.exception("Failed to record duplicate of %s for message %s", existing["file_id"], message.id)
+        return self._duplicate_result(existing, source)
 
-        def _delete() -> None:
-            self._s3_client.delete_object(Bucket=self._s3_bucket, Key=object_key)
+    @staticmethod
+    def _read_encoding_setting(guild_id: int) -> str | dict[str, str] | None:
+        try:
+            with open(f"configs/guilds/{guild_id}.json", "r") as file:
+                return json.load(file).get("media_encoding_profile")
+        except (OSError, ValueError):
+            return None
 
-        await asyncio.to_thread(_delete)
+    async def _image_profile(self, guild_id: int, attachment: discord.Attachment) -> EncodingProfile:
+        content_type = (attachment.content_type or "").split(";")[0].strip().lower()
+        if not content_type.startswith("image/"):
+            content_type = mimetypes.guess_type(attachment.filename)[0] or ""
+        # The guild config can change at any time, so it is read per upload, off the event loop
+        guild_setting = await asyncio.to_thread(self._read_encoding_setting, guild_id)
+        return select_profile(content_type, guild_setting)
 
-    async def _save_image(self, data: bytes, file_stem: str) -> tuple[Path, Optional[Path], str]:
+    async def _save_image(self, source: MediaData, file_stem: str,
+                          profile: EncodingProfile) -> tuple[MediaData, Optional[MediaData], str]:
+        # Bytes in means bytes out; only files are passed to the worker by path
+        in_memory = isinstance(source, bytes)
         try:
-            with Image.open(io.BytesIO(data)) as img:
-                fd, webp_path = tempfile.mkstemp(suffix=".webp")
-                os.close(fd)
-                file_path = Path(webp_path)
-
-                if getattr(img, "is_animated", False):
-                    frames = []
-                    durations: list[int] = []
-                    for frame in ImageSequence.Iterator(img):
-                        frames.append(frame.convert("RGBA"))
-                        durations.append(int(frame.info.get("duration", img.info.get("duration", 0)) or 0))
-                    base_frame = frames[0]
-                    save_kwargs: dict[str, Any] = {
-                        "format": "WEBP",
-                        "save_all": True,
-                        "append_images": frames[1:],
-                        "loop": img.info.get("loop", 0),
-                        "duration": durations,
-                        "lossless": True,
-                    }
-                    base_frame.save(file_path, **save_kwargs)
-                else:
-                    converted = img.convert("RGBA") if img.mode not in {"RGB", "RGBA"} else img.copy()
-                    converted.save(file_path, "WEBP", lossless=True)
-                    base_frame = converted
-
-                fd_thumb, thumb_path = tempfile.mkstemp(suffix=".webp")
-                os.close(fd_thumb)
-                thumbnail_path = Path(thumb_path)
-                thumb_image = base_frame.copy()
-                thumb_image.thumbnail((512, 512))
-                thumb_image.save(thumbnail_path, "WEBP", lossless=True)
-                return file_path, thumbnail_path, ".webp"
+            file_data, thumbnail_data, file_format = await self._media_worker.run(
+                f"image {file_stem} ({profile.name})",
+                transcode_image,
+                source if in_memory else str(source),
+                profile,
+                THUMBNAIL_PROFILE,
+                in_memory,
+            )
+        except MediaQueueFull:
+            raise
         except Exception as exc:
             raise RuntimeError(f"Failed to process image: {exc}") from exc
+        if in_memory:
+            return file_data, thumbnail_data, file_format
+        return Path(file_data), Path(thumbnail_data) if thumbnail_data else None, file_format
 
-    async def _save_video(
-            self,
-            data: bytes,
-            file_stem: str,
-            source_extension: str,
-            content_type: str,
-    ) -> tuple[Path, Optional[Path], str]:
-        extension = (source_extension or "").lower()
-        ctype = (content_type or "").lower()
-        is_mp4 = extension == ".mp4" or ctype == "video/mp4"
+    @staticmethod
+    async def _probe_codecs(source_path: Path) -> dict[str, set[str]]:
+        """
+        Reads the codecs of the streams of a media file with ffprobe.
+
+        :param source_path: The media file.
+        :type source_path: Path
+        :return: The codec names per stream type, e.g. ``{"video": {"h264"}, "audio": {"aac"}}``.
+        :rtype: dict[str, set[str]]
+        """
+        process = await asyncio.create_subprocess_exec(
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "stream=codec_type,codec_name",
+            "-of",
+            "json",
+            str(source_path),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(stderr.decode())
+        codecs: dict[str, set[str]] = {}
+        for stream in json.loads(stdout or b"{}").get("streams", []):
+            codecs.setdefault(stream.get("codec_type", ""), set()).add(stream.get("codec_name", ""))
+        return codecs
+
+    async def _save_video(self, source_path: Path, file_stem: str) -> tuple[Path, Optional[Path], str]:
         file_path: Optional[Path] = None
-        input_temp: Optional[Path] = None
+        thumbnail_path: Optional[Path] = None
         try:
-            if is_mp4:
-                fd_dest, dest_path = tempfile.mkstemp(suffix=".mp4")
-                os.close(fd_dest)
-                file_path = Path(dest_path)
-                file_path.write_bytes(data)
-            else:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=extension or ".tmp") as temp_file:
-                    temp_file.write(data)
-                    input_temp = Path(temp_file.name)
-                fd_dest, dest_path = tempfile.mkstemp(suffix=".mp4")
-                os.close(fd_dest)
-                file_path = Path(dest_path)
-                process = await asyncio.create_subprocess_exec(
-                    "ffmpeg",
-                    "-y",
-                    "-i",
-                    str(input_temp),
-                    "-c:v",
-                    "libx264",
-                    "-preset",
-                    "fast",
-                    "-crf",
-                    "22",
-                    "-c:a",
-                    "aac",
-                    str(file_path),
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                _, stderr = await process.communicate()
-                if process.returncode != 0:
-                    raise RuntimeError(stderr.decode())
+            try:
+                codecs = await self._probe_codecs(source_path)
+            except Exception as exc:
+                logger.warning(f"ffprobe failed for {file_stem}, transcoding instead: {exc}")
+                codecs = {}
+            video_codecs = codecs.get("video", set())
+            audio_codecs = codecs.get("audio", set())
+            # h264 video is browser-friendly as is; other audio (Opus, MP3, ...) only needs the audio re-encoded
+            copy_video = video_codecs == {"h264"}
+            copy_audio = audio_codecs <= {"aac"}
+            can_remux = copy_video and copy_audio
+            codec_args = [
+                "-c:v", *(["copy"] if copy_video else ["libx264", "-preset", "fast", "-crf", "22"]),
+                "-c:a", "copy" if copy_audio else "aac",
+            ]
 
+            fd_dest, dest_path = tempfile.mkstemp(suffix=".mp4")
+            os.close(fd_dest)
+            file_path = Path(dest_path)
             fd_thumb, thumb_path = tempfile.mkstemp(suffix=".webp")
             os.close(fd_thumb)
             thumbnail_path = Path(thumb_path)
-            thumb_process = await asyncio.create_subprocess_exec(
+            # One invocation writes both outputs, so the input is read and decoded only once
+            process = await asyncio.create_subprocess_exec(
                 "ffmpeg",
                 "-y",
                 "-i",
+                str(source_path),
+                "-map",
+                "0:v:0",
+                "-map",
+                "0:a?",
+                *codec_args,
+                "-movflags",
+                "+faststart",
                 str(file_path),
+                "-map",
+                "0:v:0",
                 "-vf",
                 "thumbnail,scale=512:-1",
                 "-frames:v",
@@ -324,30 +608,58 @@ class ImageUpvote(commands.Cog):
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
             )
-            _, thumb_stderr = await thumb_process.communicate()
-            if thumb_process.returncode != 0:
-                raise RuntimeError(thumb_stderr.decode())
+            _, stderr = await process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError(stderr.decode())
+            if can_remux:
+                logger.info(f"Remuxed video {file_stem}.")
+            elif copy_video:
+                logger.info(f"Remuxed video {file_stem}, transcoded its audio.")
+            else:
+                logger.info(f"Transcoded video {file_stem}.")
             return file_path, thumbnail_path, ".mp4"
         except Exception as exc:
+            if file_path:
+                file_path.unlink(missing_ok=True)
+            if thumbnail_path:
+                thumbnail_path.unlink(missing_ok=True)
             raise RuntimeError(f"Failed to process video: {exc}") from exc
-        finally:
-            if input_temp:
-                input_temp.unlink(missing_ok=True)
 
-    async def _save_audio(self, data: bytes, file_stem: str, source_extension: str) -> tuple[Path, Optional[Path], str]:
+    async def _save_audio(self, source: MediaData, file_stem: str) -> tuple[MediaData, Optional[MediaData], str]:
+        if isinstance(source, bytes):
+            # mp3 can be written to a pipe, so small audio never touches the disk
+            process = await asyncio.create_subprocess_exec(
+                "ffmpeg",
+                "-i",
+                "pipe:0",
+                "-vn",
+                "-ar",
+                "44100",
+                "-ac",
+                "2",
+                "-b:a",
+                "192k",
+                "-f",
+                "mp3",
+                "pipe:1",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, stderr = await process.communicate(input=source)
+            if process.returncode != 0:
+                raise RuntimeError(f"Failed to process audio: {stderr.decode()}")
+            return stdout, None, ".mp3"
+
         fd_dest, dest_path = tempfile.mkstemp(suffix=".mp3")
         os.close(fd_dest)
         file_path = Path(dest_path)
-        temp_path = None
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=source_extension or ".tmp") as temp_file:
-                temp_file.write(data)
-                temp_path = Path(temp_file.name)
             process = await asyncio.create_subprocess_exec(
                 "ffmpeg",
                 "-y",
                 "-i",
-                str(temp_path),
+                str(source),
                 "-vn",
                 "-ar",
                 "44100",
@@ -364,24 +676,121 @@ class ImageUpvote(commands.Cog):
                 raise RuntimeError(stderr.decode())
             return file_path, None, ".mp3"
         except Exception as exc:
+            file_path.unlink(missing_ok=True)
             raise RuntimeError(f"Failed to process audio: {exc}") from exc
-        finally:
-            if temp_path:
-                temp_path.unlink(missing_ok=True)
 
-    async def delete_media_entry(self, file_id_str: str) -> tuple[bool, Optional[str], Optional[dict[str, Any]]]:
+    @staticmethod
+    def _filter_conditions(
+            args: list[Any],
+            creator_name: Optional[str],
+            uploaded_after: Optional[datetime],
+            uploaded_before: Optional[datetime],
+            source_message_id: Optional[int],
+    ) -> list[str]:
+        # Appends the values to args and returns the matching WHERE conditions
+        conditions: list[str] = []
+        if creator_name:
+            args.append(creator_name)
+            conditions.append(f"creator_name = ${len(args)}")
+        if uploaded_after:
+            args.append(uploaded_after)
+            conditions.append(f"date_of_upload >= ${len(args)}")
+        if uploaded_before:
+            args.append(uploaded_before)
+            conditions.append(f"date_of_upload < ${len(args)}")
+        if source_message_id:
+            args.append(source_message_id)
+            conditions.append(f"source_message_id = ${len(args)}")
+        return conditions
+
+    async def count_media_entries(
+            self,
+            creator_name: Optional[str] = None,
+            uploaded_after: Optional[datetime] = None,
+            uploaded_before: Optional[datetime] = None,
+            source_message_id: Optional[int] = None,
+    ) -> Optional[int]:
+        """
+        Counts the media entries matching all given filters, so a delete by filters can be confirmed first.
+
+        :return: The number of matching entries, or None if the database could not be queried.
+        :rtype: Optional[int]
+        """
         if not self._db_pool:
-            return False, "Database connection is not initialised.", None
-        if not self._s3_client or not self._s3_bucket:
-            return False, "S3 client is not configured.", None
+            return None
+        args: list[Any] = []
+        conditions = self._filter_conditions(args, creator_name, uploaded_after, uploaded_before, source_message_id)
+        if not conditions:
+            return None
         try:
-            file_uuid = uuid.UUID(file_id_str)
-        except ValueError:
-            return False, "The provided file_id is not a valid UUID.", None
+            async with self._db_pool.acquire() as connection:
+                return await connection.fetchval(
+                    f"SELECT count(*) FROM {DATABASE_TABLE} WHERE {' AND '.join(conditions)}",
+                    *args,
+                )
+        except Exception:
+            logger.exception("Failed to count media entries")
+            return None
+
+    async def delete_media_entries(
+            self,
+            file_ids: Optional[list[str]] = None,
+            creator_name: Optional[str] = None,
+            uploaded_after: Optional[datetime] = None,
+            uploaded_before: Optional[datetime] = None,
+            source_message_id: Optional[int] = None,
+    ) -> tuple[Optional[str], list[dict[str, Any]], bool]:
+        """
+        Deletes every media entry matching all given filters, at most ``DELETE_LIMIT`` (the oldest) per call.
+        Stored files are removed in batches, and the rows of all entries whose files are gone are deleted in a
+        single transaction. Files that other entries still point to, because they are duplicates of the same
+        upload, are kept.
+
+        :param file_ids: The file IDs to delete.
+        :type file_ids: list[str] | None
+        :param creator_name: Only entries of this creator.
+        :type creator_name: str | None
+        :param uploaded_after: Only entries uploaded at or after this time.
+        :type uploaded_after: datetime | None
+        :param uploaded_before: Only entries uploaded before this time.
+        :type uploaded_before: datetime | None
+        :param source_message_id: Only entries uploaded from this message.
+        :type source_message_id: int | None
+        :return: An error message if nothing could be attempted, the result per entry, and whether more entries
+            matched than ``DELETE_LIMIT``. Each result has the entry metadata plus ``deleted`` and, if that is
+            False, a ``reason``.
+        :rtype: tuple[Optional[str], list[dict[str, Any]], bool]
+        """
+        if not self._db_pool:
+            return "Database connection is not initialised.", [], False
+        if not self._storage:
+            return "Media storage is not configured.", [], False
+
+        results: list[dict[str, Any]] = []
+        conditions: list[str] = []
+        args: list[Any] = []
+        if file_ids is not None:
+            uuids: list[uuid.UUID] = []
+            for file_id in file_ids:
+                try:
+                    uuids.append(uuid.UUID(file_id))
+                except ValueError:
+                    results.append({"file_id": file_id, "deleted": False, "reason": "Not a valid UUID."})
+            if not uuids:
+                return None, results, False
+            args.append(uuids)
+            conditions.append(f"file_id = ANY(${len(args)}::uuid[])")
+        conditions.extend(
+            self._filter_conditions(args, creator_name, uploaded_after, uploaded_before, source_message_id)
+        )
+        if not conditions:
+            return "At least one file ID or filter is required.", results, False
+        # One extra row tells whether more entries matched than are deleted in one run
+        args.append(DELETE_LIMIT + 1)
 
         try:
             async with self._db_pool.acquire() as connection:
-                record = await connection.fetchrow(
+                records = await connection.fetch(
                     f"""
                         SELECT file_id,
                                filename,
@@ -390,62 +799,300 @@ class ImageUpvote(commands.Cog):
                                file_format,
                                creator_name,
                                uploaded_by,
-                               date_of_upload
+                               date_of_upload,
+                               source_message_id,
+                               content_hash
                         FROM {DATABASE_TABLE}
-                        WHERE file_id=$1
+                        WHERE {" AND ".join(conditions)}
+                        ORDER BY date_of_upload
+                        LIMIT ${len(args)}
                     """,
-                    file_uuid,
+                    *args,
                 )
+                truncated = len(records) > DELETE_LIMIT
+                records = records[:DELETE_LIMIT]
+                # Files that entries outside of this delete still point to (duplicates of one upload)
+                shared_paths = {
+                    row["file_path"]
+                    for row in await connection.fetch(
+                        f"""
+                        SELECT DISTINCT file_path
+                        FROM {DATABASE_TABLE}
+                        WHERE file_path = ANY($1::text[]) AND NOT (file_id = ANY($2::uuid[]))
+                        """,
+                        [record["file_path"] for record in records],
+                        [record["file_id"] for record in records],
+                    )
+                }
         except Exception:
-            logger.exception("Failed to fetch media metadata for %s", file_id_str)
-            return False, "Failed to query media metadata.", None
-
-        if record is None:
-            return False, "No media entry found for that file_id.", None
-
-        main_key = self._extract_key_from_url(record["file_path"])
-        thumb_key = self._extract_key_from_url(record["thumbnail_path"])
-        if not main_key:
-            return False, "Could not determine the S3 object key for the media file.", None
-
-        metadata: dict[str, Any] = {
-            "file_id": str(record["file_id"]),
-            "filename": record["filename"],
-            "file_url": record["file_path"],
-            "thumbnail_url": record["thumbnail_path"],
-            "file_format": record["file_format"],
-            "creator_name": record["creator_name"],
-            "uploaded_by": record["uploaded_by"],
-            "date_of_upload": record["date_of_upload"],
-        }
+            logger.exception("Failed to fetch media metadata for deletion")
+            return "Failed to query media metadata.", results, False
 
-        try:
-            await self._delete_s3_object(main_key)
+        if file_ids is not None:
+            found = {str(record["file_id"]) for record in records}
+            results.extend(
+                {"file_id": str(file_uuid), "deleted": False, "reason": "No media entry found."}
+                for file_uuid in args[0]
+                if str(file_uuid) not in found
+            )
+
+        entries: list[tuple[dict[str, Any], list[str], Optional[int]]] = []
+        # Content hashes of deleted entries whose files stay, moved to a remaining entry for deduplication
+        handovers: dict[str, tuple[str, str]] = {}
+        for record in records:
+            metadata: dict[str, Any] = {
+                "file_id": str(record["file_id"]),
+                "filename": record["filename"],
+                "file_url": record["file_path"],
+                "thumbnail_url": record["thumbnail_path"],
+                "file_format": record["file_format"],
+                "creator_name": record["creator_name"],
+                "uploaded_by": record["uploaded_by"],
+                "date_of_upload": record["date_of_upload"],
+                "deleted": False,
+            }
+            if record["file_path"] in shared_paths:
+                metadata["shared"] = True
+                if record["content_hash"]:
+                    handovers[metadata["file_id"]] = (record["content_hash"], record["file_path"])
+                entries.append((metadata, [], record["source_message_id"]))
+                continue
+            main_key = self._storage.key_from_url(record["file_path"])
+            if not main_key:
+                metadata["reason"] = "Could not determine the storage key for the media file."
+                results.append(metadata)
+                continue
+            keys = [main_key]
+            thumb_key = self._storage.key_from_url(record["thumbnail_path"])
             if thumb_key:
-                await self._delete_s3_object(thumb_key)
-        except Exception as exc:
-            logger.exception("Failed to delete S3 objects for %s", file_uuid)
-            return False, f"Failed to delete from S3: {exc}", metadata
+                keys.append(thumb_key)
+            entries.append((metadata, keys, record["source_message_id"]))
 
-        try:
-            async with self._db_pool.acquire() as connection:
-                await connection.execute(
-                    f"DELETE FROM {DATABASE_TABLE} WHERE file_id=$1",
-                    file_uuid,
+        # Duplicates deleted together share their keys, which are deleted once
+        key_errors = await self._storage.delete_many(
+            list(dict.fromkeys(key for _, keys, _ in entries for key in keys))
+        )
+        removable: list[tuple[dict[str, Any], Optional[int]]] = []
+        for metadata, keys, message_id in entries:
+            errors = [key_errors.get(key) for key in keys if key_errors.get(key)]
+            if errors:
+                metadata["reason"] = f"Failed to delete from {self._storage.name}: {errors[0]}"
+                results.append(metadata)
+            else:
+                removable.append((metadata, message_id))
+
+        if removable:
+            try:
+                async with self._db_pool.acquire() as connection:
+                    async with connection.transaction():
+                        await connection.execute(
+                            f"DELETE FROM {DATABASE_TABLE} WHERE file_id = ANY($1::uuid[])",
+                            [uuid.UUID(metadata["file_id"]) for metadata, _ in removable],
+                        )
+                        await connection.executemany(
+                            f"""
+                            UPDATE {DATABASE_TABLE}
+                            SET content_hash=$1
+                            WHERE file_id = (
+                                SELECT file_id
+                                FROM {DATABASE_TABLE}
+                                WHERE file_path=$2 AND content_hash IS NULL
+                                ORDER BY date_of_upload
+                                LIMIT 1
+                            )
+                            """,
+                            [handovers[metadata["file_id"]] for metadata, _ in removable
+                             if metadata["file_id"] in handovers],
+                        )
+            except Exception as exc:
+                logger.exception("Deleted stored files but failed to remove %s DB records", len(removable))
+                for metadata, _ in removable:
+                    metadata["reason"] = (
+                        f"Files removed from {self._storage.name}, but database deletion failed: {exc}"
+                    )
+                    results.append(metadata)
+                return None, results, truncated
+            for metadata, message_id in removable:
+                metadata["deleted"] = True
+                results.append(metadata)
+                if message_id is not None:
+                    # Other attachments of the message may still be uploaded; the next check asks the database
+                    self._uploaded_messages.pop(message_id)
+
+        logger.info(
+            "Deleted %s media entries from %s and database (%s failed).",
+            len(removable), self._storage.name, len(results) - len(removable),
+        )
+        return None, results, truncated
+
+    async def _process_attachment(
+            self,
+            message: discord.Message,
+            attachment: discord.Attachment,
+            index: int,
+            uploader_name: str,
+    ) -> dict[str, Any]:
+        """
+        Downloads, converts, uploads and records a single attachment. At most ``PIPELINE_CONCURRENCY``
+        attachments are processed at the same time across all messages.
+
+        :return: The uploaded file name, its URLs, format and size.
+        :rtype: dict[str, Any]
+        """
+        extension = Path(attachment.filename).suffix.lower()
+        file_stem = self._build_file_stem(message, index)
+        content_type = (attachment.content_type or "").lower()
+        is_image = content_type.startswith("image") or extension in {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+        is_video = not is_image and (
+                content_type.startswith("video") or extension in {".mp4", ".mov", ".mkv", ".webm", ".avi"})
+        is_audio = not is_image and not is_video and (
+                content_type.startswith("audio") or extension in {".mp3", ".wav", ".ogg", ".flac", ".m4a"})
+        # Videos always go through files: mp4 needs seekable input, and +faststart needs seekable output
+        in_memory = attachment.size <= IN_MEMORY_LIMIT and (
+                is_image or (is_audio and extension in PIPEABLE_AUDIO_EXTENSIONS))
+        async with self._pipeline_semaphore:
+            source: Optional[MediaData] = None
+            file_data: Optional[MediaData] = None
+            thumbnail_data: Optional[MediaData] = None
+            try:
+                source, content_hash = await self._download_attachment(attachment, in_memory=in_memory)
+                existing = await self._find_upload_by_hash(content_hash)
+                if existing is not None:
+                    logger.info(f"Message {message.id} attachment is a duplicate of {existing['file_id']}.")
+                    return await self._record_duplicate(message, uploader_name, existing, source)
+                if is_image:
+                    profile = await self._image_profile(message.guild.id, attachment)
+                    file_data, thumbnail_data, file_format = await self._save_image(source, file_stem, profile)
+                elif is_video:
+                    file_data, thumbnail_data, file_format = await self._save_video(source, file_stem)
+                elif is_audio:
+                    file_data, thumbnail_data, file_format = await self._save_audio(source, file_stem)
+                else:
+                    raise ValueError("Unsupported content type")
+                size_mb = self._media_size(file_data) / (1024 * 1024)
+                s3_filename = f"{file_stem}{file_format}"
+
+                # The main file and its thumbnail are uploaded concurrently
+                uploads = [(file_data, s3_filename, self._content_type_for_extension(file_format))]
+                if thumbnail_data:
+                    thumbnail_extension = (
+                        thumbnail_data.suffix if isinstance(thumbnail_data, Path) else THUMBNAIL_PROFILE.extension
+                    )
+                    uploads.append((
+                        thumbnail_data,
+                        f"thumbnails/{file_stem}{thumbnail_extension}",
+                        self._content_type_for_extension(thumbnail_extension),
+                    ))
+                results = await asyncio.gather(
+                    *(self._storage.upload(data, key, ctype)
+                      for data, key, ctype in uploads),
+                    return_exceptions=True,
                 )
-        except Exception as exc:
-            logger.exception("Deleted S3 objects but failed to remove DB record for %s", file_uuid)
-            return False, f"S3 objects removed, but database deletion failed: {exc}", metadata
+                errors = [result for result in results if isinstance(result, BaseException)]
+                if errors:
+                    for (_, key, _), result in zip(uploads, results):
+                        if not isinstance(result, BaseException):
+                            try:
+                                await self._storage.delete(key)
+                            except Exception:
+                                logger.exception("Failed to remove partial upload %s", key)
+                    raise errors[0]
+                file_url = results[0]
+                thumb_url = results[1] if len(results) > 1 else None
 
-        logger.info("Deleted media entry %s from S3 and database.", file_uuid)
-        return True, None, metadata
+                recorded = await self._record_upload(
+                    filename=s3_filename,
+                    file_url=file_url,
+                    thumbnail_url=thumb_url,
+                    file_format=file_format,
+                    creator_name=message.author.display_name,
+                    uploaded_by=uploader_name,
+                    source_message_id=message.id,
+                    content_hash=content_hash,
+                )
+                if not recorded:
+                    # The same content was uploaded concurrently and recorded first; drop our copy
+                    for _, key, _ in uploads:
+                        try:
+                            await self._storage.delete(key)
+                        except Exception:
+                            logger.exception("Failed to remove duplicate upload %s", key)
+                    existing = await self._find_upload_by_hash(content_hash)
+                    if existing is None:
+                        raise RuntimeError("Upload conflicted with an entry that no longer exists")
+                    return await self._record_duplicate(message, uploader_name, existing, source)
+                logger.info(
+                    f"Saved message {message.id} attachment as {s3_filename}"
+                    f"{' (in memory)' if in_memory else ''}."
+                )
+                return {
+                    "filename": s3_filename,
+                    "file_url": file_url,
+                    "thumbnail_url": thumb_url,
+                    "file_format": file_format,
+                    "size_mb": size_mb,
+                    "duplicate": False,
+                }
+            finally:
+                for data in (source, file_data, thumbnail_data):
+                    if isinstance(data, Path):
+                        data.unlink(missing_ok=True)
+
+    @staticmethod
+    def _media_size(data: MediaData) -> int:
+        return len(data) if isinstance(data, bytes) else data.stat().st_size
+
+    @classmethod
+    def _duplicate_result(cls, existing: asyncpg.Record, source: MediaData) -> dict[str, Any]:
+        return {
+            "filename": existing["filename"],
+            "file_url": existing["file_path"],
+            "thumbnail_url": existing["thumbnail_path"],
+            "file_format": existing["file_format"],
+            "size_mb": cls._media_size(source) / (1024 * 1024),
+            "duplicate": True,
+        }
+
+    @staticmethod
+    def _format_event_status(item_lines: list[str], footer_lines: list[str]) -> str:
+        # Admin log statuses are embed fields, so the per-item lines are cut off before the footer would be
+        footer = "\n".join(footer_lines)
+        budget = EMBED_FIELD_LIMIT - len(footer) - 1
+        kept: list[str] = []
+        for position, line in enumerate(item_lines):
+            remaining = len(item_lines) - position - 1
+            suffix = f"\n...and {remaining} more" if remaining else ""
+            if len("\n".join(kept + [line])) + len(suffix) > budget:
+                kept.append(f"...and {len(item_lines) - position} more")
+                break
+            kept.append(line)
+        return "\n".join(kept + footer_lines)[:EMBED_FIELD_LIMIT]
 
     async def handle_upload(
             self,
             message: discord.Message,
             source: str,
             interaction: discord.Interaction | None = None,
+            requester: discord.abc.User | None = None,
+            notify_failure: bool = True,
     ) -> bool:
+        """
+        Uploads every supported attachment of a message.
+
+        :param message: The message whose attachments are uploaded.
+        :type message: discord.Message
+        :param source: ``"upvote"`` or ``"force"``.
+        :type source: str
+        :param interaction: The interaction of an inline force upload.
+        :type interaction: discord.Interaction | None
+        :param requester: The user who forced the upload, if it was queued instead of handled inline.
+        :type requester: discord.abc.User | None
+        :param notify_failure: Whether a complete failure is reported with a reaction and an admin log event.
+            Queued jobs that will be retried pass ``False``.
+        :type notify_failure: bool
+        :return: Whether at least one attachment was uploaded.
+        :rtype: bool
+        """
         media_attachments = [
             att
             for att in message.attachments
@@ -453,120 +1100,81 @@ class ImageUpvote(commands.Cog):
         ]
         if not media_attachments:
             return False
-        if not self._s3_client or not self._s3_bucket:
-            logger.error("S3 client is not configured; unable to handle uploads.")
+        if not self._storage:
+            logger.error("Media storage is not configured; unable to handle uploads.")
             return False
         admin_log_cog = (
             interaction.client.get_cog("AdminLog")
             if interaction
             else self.bot.get_cog("AdminLog")
         )
-        any_success = False
+        requester = requester or (interaction.user if interaction else None)
         uploader_name = (
-            interaction.user.display_name if source == "force" and interaction else "upvoted"
+            requester.display_name if source == "force" and requester else "upvoted"
         )
-        for idx, attachment in enumerate(media_attachments, start=1):
-            data = await attachment.read()
-            extension = Path(attachment.filename).suffix.lower()
-            file_stem = self._build_file_stem(message, idx)
-            file_path: Optional[Path] = None
-            thumbnail_path: Optional[Path] = None
-            try:
-                content_type = (attachment.content_type or "").lower()
-                if content_type.startswith("image") or extension in {".jpg", ".jpeg", ".png", ".gif", ".webp"}:
-                    file_path, thumbnail_path, file_format = await self._save_image(data, file_stem)
-                elif content_type.startswith("video") or extension in {".mp4", ".mov", ".mkv", ".webm", ".avi"}:
-                    file_path, thumbnail_path, file_format = await self._save_video(
-                        data,
-                        file_stem,
-                        extension,
-                        content_type,
-                    )
-                elif content_type.startswith("audio") or extension in {".mp3", ".wav", ".ogg", ".flac", ".m4a"}:
-                    file_path, thumbnail_path, file_format = await self._save_audio(data, file_stem, extension)
-                else:
-                    raise ValueError("Unsupported content type")
-                size_mb = file_path.stat().st_size / (1024 * 1024)
-                s3_filename = f"{file_stem}{file_format}"
-                file_key = s3_filename
-                file_url = await self._upload_to_s3(
-                    local_path=file_path,
-                    object_key=file_key,
-                    content_type=self._content_type_for_extension(file_format),
-                )
-                thumb_url = None
-                if thumbnail_path:
-                    thumb_key = f"thumbnails/{file_stem}.webp"
-                    thumb_url = await self._upload_to_s3(
-                        local_path=thumbnail_path,
-                        object_key=thumb_key,
-                        content_type="image/webp",
-                    )
-                await self._record_upload(
-                    filename=s3_filename,
-                    file_url=file_url,
-                    thumbnail_url=thumb_url,
-                    file_format=file_format,
-                    creator_name=message.author.display_name,
-                    uploaded_by=uploader_name,
-                )
-                logger.info(
-                    f"Saved message {message.id} attachment as {file_path.name}."
-                )
-                any_success = True
-                if admin_log_cog:
-                    event = (
-                        "Media force uploaded"
-                        if source == "force"
-                        else "Media uploaded via upvotes"
-                    )
-                    event_lines = [
-                        f"{s3_filename} - {size_mb:.2f} MB",
-                        file_url,
-                    ]
-                    if thumb_url:
-                        event_lines.append(f"Thumbnail: {thumb_url}")
-                    if source == "force" and interaction:
-                        event_lines.append(
-                            f"Force by {interaction.user.mention} in {message.channel.mention}"
-                        )
-                    event_lines.append(f"Uploaded by: {uploader_name}")
-                    event_lines.append(message.jump_url)
-                    event_status = "\n".join(event_lines)
-                    await admin_log_cog.log_event(
-                        message.guild.id,
-                        priority="info",
-                        event_name=event,
-                        event_status=event_status,
-                    )
-            except Exception as exc:
+        results = await asyncio.gather(
+            *(self._process_attachment(message, attachment, idx, uploader_name)
+              for idx, attachment in enumerate(media_attachments, start=1)),
+            return_exceptions=True,
+        )
+        uploaded: list[dict[str, Any]] = []
+        failed: list[tuple[str, BaseException]] = []
+        for attachment, result in zip(media_attachments, results):
+            if isinstance(result, BaseException):
                 logger.error(
-                    f"Failed to save attachment {attachment.filename} from message {message.id}: {exc}"
+                    f"Failed to save attachment {attachment.filename} from message {message.id}: {result}"
                 )
-                if admin_log_cog:
-                    await admin_log_cog.log_event(
-                        message.guild.id,
-                        priority="error",
-                        event_name="Media upload failed",
-                        event_status=(
-                            f"{attachment.filename}\n"
-                            f"{message.jump_url}\n"
-                            f"Reason: {exc}"
-                        ),
-                    )
-                continue
-            finally:
-                if file_path:
-                    file_path.unlink(missing_ok=True)
-                if thumbnail_path:
-                    thumbnail_path.unlink(missing_ok=True)
+                failed.append((attachment.filename, result))
+            else:
+                uploaded.append(result)
+
+        if admin_log_cog and uploaded:
+            event = (
+                "Media force uploaded"
+                if source == "force"
+                else "Media uploaded via upvotes"
+            )
+            item_lines: list[str] = []
+            for item in uploaded:
+                if item["duplicate"]:
+                    item_lines.append(f"{item['filename']} - duplicate, already uploaded")
+                else:
+                    item_lines.append(f"{item['filename']} - {item['size_mb']:.2f} MB")
+                item_lines.append(item["file_url"])
+                if item["thumbnail_url"]:
+                    item_lines.append(f"Thumbnail: {item['thumbnail_url']}")
+            footer_lines: list[str] = []
+            if source == "force" and requester:
+                footer_lines.append(
+                    f"Force by {requester.mention} in {message.channel.mention}"
+                )
+            footer_lines.append(f"Uploaded by: {uploader_name}")
+            footer_lines.append(message.jump_url)
+            await admin_log_cog.log_event(
+                message.guild.id,
+                priority="info",
+                event_name=event,
+                event_status=self._format_event_status(item_lines, footer_lines),
+            )
+        if admin_log_cog and failed and (uploaded or notify_failure):
+            await admin_log_cog.log_event(
+                message.guild.id,
+                priority="error",
+                event_name="Media upload failed",
+                event_status=self._format_event_status(
+                    [f"{filename} - Reason: {exc}" for filename, exc in failed],
+                    [message.jump_url],
+                ),
+            )
+
+        any_success = bool(uploaded)
         if any_success:
-            self._uploaded_messages.add(message.id)
+            self._uploaded_messages[message.id] = True
             try:
                 await message.add_reaction("✅")
             except discord.HTTPException:
                 logger.warning("Failed to add success reaction for message %s", message.id)
-        else:
+        elif notify_failure:
             if not any(
                     str(reaction.emoji) == "❎" and reaction.me
                     for reaction in message.reactions
@@ -577,40 +1185,261 @@ class ImageUpvote(commands.Cog):
                     pass
         return any_success
 
-    @commands.Cog.listener()
-    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
-        if payload.emoji.name != UPVOTE_EMOJI_NAME:
+    async def enqueue_upload(
+            self,
+            message: discord.Message,
+            source: str,
+            requester: discord.abc.User | None = None,
+    ) -> bool:
+        """
+        Queues the upload of a message for the upload workers. Without a database the upload is handled inline.
+
+        :param message: The message to upload.
+        :type message: discord.Message
+        :param source: ``"upvote"`` or ``"force"``.
+        :type source: str
+        :param requester: The user who forced the upload.
+        :type requester: discord.abc.User | None
+        :return: Whether the message was queued (or, inline, uploaded). False if it is already queued.
+        :rtype: bool
+        """
+        if self._db_pool is None:
+            return await self.handle_upload(message, source=source, requester=requester)
+        async with self._db_pool.acquire() as connection:
+            job_id = await connection.fetchval(
+                f"""
+                INSERT INTO {JOBS_TABLE} (guild_id, channel_id, message_id, source, requested_by)
+                VALUES ($1, $2, $3, $4, $5)
+                ON CONFLICT (message_id) WHERE status IN ('pending', 'running') DO NOTHING
+                RETURNING job_id
+                """,
+                message.guild.id,
+                message.channel.id,
+                message.id,
+                source,
+                requester.id if requester else None,
+            )
+        self._queued_messages[message.id] = True
+        if job_id is None:
+            logger.info(f"Upload of message {message.id} is already queued.")
+            return False
+        logger.info(f"Queued upload job {job_id} for message {message.id} ({source}).")
+        self._job_available.set()
+        return True
+
+    async def _claim_job(self) -> Optional[asyncpg.Record]:
+        async with self._db_pool.acquire() as connection:
+            return await connection.fetchrow(
+                f"""
+                UPDATE {JOBS_TABLE}
+                SET status='running', attempts=attempts + 1, updated_at=now()
+                WHERE job_id = (
+                    SELECT job_id FROM {JOBS_TABLE}
+                    WHERE status='pending' AND run_after <= now()
+                    ORDER BY run_after, job_id
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING *
+                """
+            )
+
+    async def _finish_job(self, job: asyncpg.Record, status: str, error: Optional[str] = None,
+                          retry_in: Optional[int] = None) -> None:
+        async with self._db_pool.acquire() as connection:
+            await connection.execute(
+                f"""
+                UPDATE {JOBS_TABLE}
+                SET status=$2,
+                    last_error=$3,
+                    run_after=now() + make_interval(secs => $4),
+                    updated_at=now()
+                WHERE job_id=$1
+                """,
+                job["job_id"],
+                status,
+                error,
+                float(retry_in or 0),
+            )
+        if status != "pending":
+            # A failed message may be upvoted into a new job; a done one is in the uploaded index
+            self._queued_messages.pop(job["message_id"])
+
+    async def _upload_worker(self, worker_id: int) -> None:
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                job = await self._claim_job()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Upload worker {worker_id} failed to claim a job")
+                job = None
+            if job is None:
+                self._job_available.clear()
+                try:
+                    await asyncio.wait_for(self._job_available.wait(), timeout=UPLOAD_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            # Other idle workers may have work too
+            self._job_available.set()
+            await self._run_job(worker_id, job)
+
+    async def _run_job(self, worker_id: int, job: asyncpg.Record) -> None:
+        job_id = job["job_id"]
+        final_attempt = job["attempts"] >= UPLOAD_MAX_ATTEMPTS
+        try:
+            channel = self.bot.get_channel(job["channel_id"]) or await self.bot.fetch_channel(job["channel_id"])
+            message = await channel.fetch_message(job["message_id"])
+        except (discord.NotFound, discord.Forbidden) as exc:
+            logger.warning(f"Upload job {job_id} dropped; message {job['message_id']} is not accessible: {exc}")
+            await self._finish_job(job, "failed", str(exc))
             return
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            await self._retry_or_fail(job, final_attempt, str(exc))
+            return
+
+        if job["source"] == "upvote" and (
+                await self._is_uploaded(message.id)
+                or any(str(reaction.emoji) == "✅" for reaction in message.reactions)
+        ):
+            await self._finish_job(job, "done")
+            return
+        requester = None
+        if job["requested_by"]:
+            requester = message.guild.get_member(job["requested_by"]) or self.bot.get_user(job["requested_by"])
+
+        logger.info(f"Upload worker {worker_id} running job {job_id} (attempt {job['attempts']}).")
+        try:
+            success = await self.handle_upload(
+                message,
+                source=job["source"],
+                requester=requester,
+                notify_failure=final_attempt,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.exception(f"Upload job {job_id} raised")
+            await self._retry_or_fail(job, final_attempt, str(exc))
+            return
+        if success:
+            await self._finish_job(job, "done")
+        else:
+            await self._retry_or_fail(job, final_attempt, "No attachment could be uploaded")
+
+    async def _retry_or_fail(self, job: asyncpg.Record, final_attempt: bool, error: str) -> None:
+        if final_attempt:
+            logger.error(f"Upload job {job['job_id']} failed after {job['attempts']} attempts: {error}")
+            await self._finish_job(job, "failed", error)
+            return
+        delay = UPLOAD_RETRY_DELAY * 2 ** (job["attempts"] - 1)
+        logger.warning(f"Upload job {job['job_id']} failed ({error}); retrying in {delay}s.")
+        await self._finish_job(job, "pending", error, retry_in=delay)
+
+    def _on_counter_evicted(self, message_id: int, count: int) -> None:
+        # Counts of messages created before this moment may have missed reactions while they were evicted
+        self._counts_valid_since = datetime.now(timezone.utc)
+
+    @staticmethod
+    def _upvote_count(message: discord.Message) -> int:
+        for reaction in message.reactions:
+            emoji_name = (
+                reaction.emoji.name
+                if hasattr(reaction.emoji, "name")
+                else str(reaction.emoji)
+            )
+            if emoji_name == UPVOTE_EMOJI_NAME:
+                return reaction.count
+        return 0
+
+    async def _fetch_reacted_message(self, payload: discord.RawReactionActionEvent) -> Optional[discord.Message]:
         channel = self.bot.get_channel(payload.channel_id)
         if channel is None:
             channel = await self.bot.fetch_channel(payload.channel_id)
         if not isinstance(channel, discord.TextChannel):
-            return
+            return None
         try:
-            message = await channel.fetch_message(payload.message_id)
+            return await channel.fetch_message(payload.message_id)
         except discord.NotFound:
+            return None
+
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        # A new gateway session may have missed reaction events; start counting from scratch
+        self._upvote_counts.clear()
+        self._counts_valid_since = datetime.now(timezone.utc)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
+        if payload.emoji.name != UPVOTE_EMOJI_NAME or payload.guild_id is None:
             return
-        if any(str(reaction.emoji) == "✅" for reaction in message.reactions):
+        if (self._uploaded_messages.get(payload.message_id) or payload.message_id in self._ignored_messages
+                or payload.message_id in self._queued_messages):
+            return
+        cached_channel = self.bot.get_channel(payload.channel_id)
+        if cached_channel is not None and not isinstance(cached_channel, discord.TextChannel):
+            return
+
+        message: Optional[discord.Message] = None
+        count = self._upvote_counts.get(payload.message_id)
+        if count is not None:
+            count += 1
+        elif discord.utils.snowflake_time(payload.message_id) >= self._counts_valid_since:
+            # Every reaction since the message was created has been seen, so this is the first one
+            count = 1
+        else:
+            # The message predates the counter; seed it once from Discord
+            message = await self._fetch_reacted_message(payload)
+            if message is None:
+                return
+            count = self._upvote_count(message)
+        self._upvote_counts[payload.message_id] = count
+        if count < UPVOTE_THRESHOLD:
             return
-        if message.id in self._uploaded_messages:
+        if await self._is_uploaded(payload.message_id):
+            return
+
+        if message is None:
+            message = await self._fetch_reacted_message(payload)
+            if message is None:
+                return
+        # Uploads recorded before source_message_id existed are only marked by the reaction
+        if any(str(reaction.emoji) == "✅" for reaction in message.reactions):
+            self._ignored_messages[message.id] = True
             return
         if not any(
                 self._is_supported_attachment(att)
                 for att in message.attachments
         ):
+            self._ignored_messages[message.id] = True
             return
-        arrow_count = 0
-        for reaction in message.reactions:
-            emoji_name = (
-                reaction.emoji.name
-                if hasattr(reaction.emoji, "name")
-                else str(reaction.emoji)
-            )
-            if emoji_name == UPVOTE_EMOJI_NAME:
-                arrow_count = reaction.count
-                break
+        # Discord's count is authoritative once the message has been fetched anyway
+        arrow_count = self._upvote_count(message)
+        self._upvote_counts[message.id] = arrow_count
         if arrow_count >= UPVOTE_THRESHOLD:
-            await self.handle_upload(message, source="upvote")
+            await self.enqueue_upload(message, source="upvote")
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent) -> None:
+        if payload.emoji.name != UPVOTE_EMOJI_NAME:
+            return
+        count = self._upvote_counts.get(payload.message_id)
+        if count:
+            self._upvote_counts[payload.message_id] = count - 1
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear(self, payload: discord.RawReactionClearEvent) -> None:
+        if payload.message_id in self._upvote_counts:
+            self._upvote_counts[payload.message_id] = 0
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear_emoji(self, payload: discord.RawReactionClearEmojiEvent) -> None:
+        if payload.emoji.name == UPVOTE_EMOJI_NAME and payload.message_id in self._upvote_counts:
+            self._upvote_counts[payload.message_id] = 0
 
 
 @shadow_bot.tree.context_menu(name="Upload to S3")
@@ -637,20 +1466,100 @@ async def force_upload(interaction: discord.Interaction, message: discord.Messag
         )
         return
     await interaction.response.defer(ephemeral=True)
+    if cog._db_pool is not None:
+        try:
+            queued = await cog.enqueue_upload(message, source="force", requester=interaction.user)
+        except Exception:
+            logger.exception(f"Failed to queue force upload of message {message.id}")
+            await interaction.followup.send("Failed to queue the upload.", ephemeral=True)
+            return
+        if queued:
+            await interaction.followup.send("Upload queued; the message gets a ✅ once it is done.", ephemeral=True)
+        else:
+            await interaction.followup.send("This message is already queued for upload.", ephemeral=True)
+        return
     success = await cog.handle_upload(message, source="force", interaction=interaction)
     if success:
-        await interaction.followup.send("Media uploaded to S3.", ephemeral=True)
+        await interaction.followup.send(f"Media uploaded to {cog._storage.name}.", ephemeral=True)
     else:
         await interaction.followup.send("Failed to save any attachments.", ephemeral=True)
 
 
-@shadow_bot.tree.command(name="delete-upload", description="Delete an uploaded media item from S3 by file id.")
+def _parse_day(value: str) -> datetime:
+    return datetime.strptime(value.strip(), "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+def _format_delete_result(result: dict[str, Any]) -> str:
+    name = result.get("filename") or "unknown"
+    if result["deleted"] and result.get("shared"):
+        return f"{result['file_id']} {name}: deleted, files kept for other uploads of the same content"
+    if result["deleted"]:
+        return f"{result['file_id']} {name}: deleted"
+    return f"{result['file_id']} {name}: FAILED - {result.get('reason', 'Unknown error')}"
+
+
+class ConfirmDeleteView(discord.ui.View):
+    def __init__(self, interaction: discord.Interaction, delete_func: Callable[[], Awaitable[None]]) -> None:
+        super().__init__(timeout=180)
+        self.interaction = interaction
+        self.delete_func = delete_func
+
+    @discord.ui.button(label="Delete", style=discord.ButtonStyle.red, emoji='🗑️')
+    async def proceed(self, interaction: discord.Interaction, button: discord.ui.Button):  # noqa
+        if interaction.user != self.interaction.user:
+            await interaction.response.send_message("You are not authorized to perform this action.",
+                                                    ephemeral=True)
+            return
+        self.stop()
+        await interaction.response.edit_message(content="Deleting media entries...", view=None)  # noqa
+        await self.delete_func()
+
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.grey, emoji='✖️')
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):  # noqa
+        if interaction.user != self.interaction.user:
+            await interaction.response.send_message("You are not authorized to perform this action.",
+                                                    ephemeral=True)
+            return
+        self.stop()
+        await interaction.response.edit_message(content="Deletion canceled; nothing was deleted.", view=None)  # noqa
+
+    async def on_timeout(self) -> None:
+        try:
+            await self.interaction.edit_original_response(
+                content="Deletion timed out; nothing was deleted.", view=None
+            )
+        except discord.HTTPException:
+            pass
+
+
+@shadow_bot.tree.command(name="delete-upload", description="Delete uploaded media by file id or filters.")
 @app_commands.allowed_installs(guilds=True, users=False)
 @app_commands.guild_only()
-@app_commands.describe(file_id="UUID for the uploaded media entry")
-async def delete_upload(interaction: discord.Interaction, file_id: str) -> None:
+@app_commands.describe(
+    file_ids="UUIDs of uploaded media entries, separated by spaces or commas",
+    creator="Only uploads of this creator (display name at upload time)",
+    uploaded_after="Only uploads on or after this day (YYYY-MM-DD, UTC)",
+    uploaded_before="Only uploads on or before this day (YYYY-MM-DD, UTC)",
+    source_message="Only uploads from this message (ID or link)",
+)
+async def delete_upload(
+        interaction: discord.Interaction,
+        file_ids: Optional[str] = None,
+        creator: Optional[str] = None,
+        uploaded_after: Optional[str] = None,
+        uploaded_before: Optional[str] = None,
+        source_message: Optional[str] = None,
+) -> None:
+    filters = {
+        "file_ids": file_ids,
+        "creator": creator,
+        "uploaded_after": uploaded_after,
+        "uploaded_before": uploaded_before,
+        "source_message": source_message,
+    }
+    filter_text = ", ".join(f"{key}={value}" for key, value in filters.items() if value)
     logger.info(
-        f"Delete upload triggered by {interaction.user} in {interaction.channel} for file_id {file_id}"
+        f"Delete upload triggered by {interaction.user} in {interaction.channel} with {filter_text or 'no filters'}"
     )
     if not interaction.user.guild_permissions.manage_messages:
         await interaction.response.send_message("You do not have permission to use this.", ephemeral=True)
@@ -659,50 +1568,129 @@ async def delete_upload(interaction: discord.Interaction, file_id: str) -> None:
     if not cog:
         await interaction.response.send_message("Image upvote system is not loaded.", ephemeral=True)
         return
+    if not filter_text:
+        await interaction.response.send_message("Provide file IDs or at least one filter.", ephemeral=True)
+        return
+    try:
+        after = _parse_day(uploaded_after) if uploaded_after else None
+        # The day given as upper bound is included
+        before = _parse_day(uploaded_before) + timedelta(days=1) if uploaded_before else None
+    except ValueError:
+        await interaction.response.send_message("Dates must use the format YYYY-MM-DD.", ephemeral=True)
+        return
+    message_id = None
+    if source_message:
+        match = re.search(r"(\d+)/?$", source_message.strip())
+        if not match:
+            await interaction.response.send_message("The source message must be an ID or a link.", ephemeral=True)
+            return
+        message_id = int(match.group(1))
+
+    file_id_list = [value for value in re.split(r"[\s,]+", file_ids) if value] if file_ids else None
+    # media_uploads is shared by every guild, so deletes that are not bounded by file IDs or a message can hit
+    # many entries; they need more than manage_messages and are confirmed first
+    bounded = file_id_list is not None or message_id is not None
+    if not bounded and not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message(
+            "Deleting by creator or date alone requires the Administrator permission.", ephemeral=True
+        )
+        return
     admin_log_cog = interaction.client.get_cog("AdminLog")
     await interaction.response.defer(ephemeral=True)
-    success, error_message, metadata = await cog.delete_media_entry(file_id)
-    if success:
-        await interaction.followup.send("Media entry deleted from S3 and database.", ephemeral=True)
-        if admin_log_cog and interaction.guild:
-            info = metadata or {}
-            event_lines = [
-                f"File ID: {info.get('file_id', file_id)}",
-                f"Filename: {info.get('filename', 'Unknown')} ({info.get('file_format', 'n/a')})",
-                f"Creator: {info.get('creator_name', 'Unknown')}",
-                f"Uploaded by: {info.get('uploaded_by', 'Unknown')}",
-            ]
-            if info.get("file_url"):
-                event_lines.append(f"File URL: {info['file_url']}")
-            if info.get("thumbnail_url"):
-                event_lines.append(f"Thumbnail URL: {info['thumbnail_url']}")
-            if info.get("date_of_upload"):
-                event_lines.append(f"Uploaded at: {info['date_of_upload']}")
-            event_lines.append(f"Deleted by: {interaction.user.mention}")
-            await admin_log_cog.log_event(
-                interaction.guild.id,
-                priority="warning",
-                event_name="Media upload deleted",
-                event_status="\n".join(event_lines),
+
+    async def run_delete() -> None:
+        error_message, results, truncated = await cog.delete_media_entries(
+            file_ids=file_id_list,
+            creator_name=creator,
+            uploaded_after=after,
+            uploaded_before=before,
+            source_message_id=message_id,
+        )
+        if error_message:
+            await interaction.followup.send(error_message, ephemeral=True)
+            if admin_log_cog and interaction.guild:
+                await admin_log_cog.log_event(
+                    interaction.guild.id,
+                    priority="error",
+                    event_name="Media deletion failed",
+                    event_status="\n".join([
+                        f"Filters: {filter_text}",
+                        f"Requested by: {interaction.user.mention}",
+                        f"Reason: {error_message}",
+                    ]),
+                )
+            return
+        if not results:
+            await interaction.followup.send("No media entries matched.", ephemeral=True)
+            return
+
+        deleted = [result for result in results if result["deleted"]]
+        failed = [result for result in results if not result["deleted"]]
+        summary = f"Deleted {len(deleted)} of {len(results)} media entries from storage and database."
+        if truncated:
+            summary += f" More entries matched; only the oldest {DELETE_LIMIT} were handled, run the command again."
+        report = "\n".join(_format_delete_result(result) for result in results)
+        if len(summary) + len(report) + 10 <= 2000:
+            await interaction.followup.send(f"{summary}\n```\n{report}\n```", ephemeral=True)
+        else:
+            await interaction.followup.send(
+                summary,
+                file=discord.File(io.BytesIO(report.encode()), filename="delete-upload-report.txt"),
+                ephemeral=True,
             )
-    else:
-        failure_message = error_message or "Failed to delete media entry."
-        await interaction.followup.send(failure_message, ephemeral=True)
+
         if admin_log_cog and interaction.guild:
-            event_lines = [
-                f"File ID: {file_id}",
-                f"Requested by: {interaction.user.mention}",
-                f"Reason: {failure_message}",
-            ]
-            if metadata and metadata.get("file_url"):
-                event_lines.append(f"File URL: {metadata['file_url']}")
+            if len(results) == 1 and deleted:
+                info = deleted[0]
+                event_lines = [
+                    f"File ID: {info['file_id']}",
+                    f"Filename: {info.get('filename', 'Unknown')} ({info.get('file_format', 'n/a')})",
+                    f"Creator: {info.get('creator_name', 'Unknown')}",
+                    f"Uploaded by: {info.get('uploaded_by', 'Unknown')}",
+                ]
+                if info.get("file_url"):
+                    event_lines.append(f"File URL: {info['file_url']}")
+                if info.get("thumbnail_url"):
+                    event_lines.append(f"Thumbnail URL: {info['thumbnail_url']}")
+                if info.get("date_of_upload"):
+                    event_lines.append(f"Uploaded at: {info['date_of_upload']}")
+                event_lines.append(f"Deleted by: {interaction.user.mention}")
+                event_status = "\n".join(event_lines)
+            else:
+                event_status = ImageUpvote._format_event_status(
+                    [_format_delete_result(result) for result in results],
+                    [f"Filters: {filter_text}", f"Deleted by: {interaction.user.mention}"]
+                    + ([f"Stopped at the limit of {DELETE_LIMIT} entries"] if truncated else []),
+                )
             await admin_log_cog.log_event(
                 interaction.guild.id,
-                priority="error",
-                event_name="Media deletion failed",
-                event_status="\n".join(event_lines),
+                priority="error" if failed else "warning",
+                event_name="Media deletion failed" if not deleted else "Media upload deleted",
+                event_status=event_status,
             )
 
+    if bounded:
+        await run_delete()
+        return
+    count = await cog.count_media_entries(
+        creator_name=creator,
+        uploaded_after=after,
+        uploaded_before=before,
+        source_message_id=message_id,
+    )
+    if count is None:
+        await interaction.followup.send("Failed to query media metadata.", ephemeral=True)
+        return
+    if count == 0:
+        await interaction.followup.send("No media entries matched.", ephemeral=True)
+        return
+    limit_note = f" Only the oldest {DELETE_LIMIT} are deleted per run." if count > DELETE_LIMIT else ""
+    await interaction.followup.send(
+        f"{count} media entries match {filter_text} and will be deleted from storage and database.{limit_note}",
+        view=ConfirmDeleteView(interaction, run_delete),
+        ephemeral=True,
+    )
+
 
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(ImageUpvote(bot))